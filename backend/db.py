@@ -1,26 +1,35 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Tuple
 
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncSession,
 )
 
 from backend.engine import Database
+from backend.migrations import SCHEMA_VERSION
 
 _db: Optional[Database] = None
+_listeners: List[AsyncConnection] = []
 
 
-def init(database_url: str) -> None:
+def init(
+    database_url: str,
+    replica_urls: Sequence[str] = (),
+    max_replica_lag: float = 2.0,
+) -> None:
     """
     Initialize the global Database instance once, early in-app startup.
     :param database_url:
+    :param replica_urls: read replicas that read-only sessions may be routed to
+    :param max_replica_lag: seconds of replication lag above which reads go to the primary
     :return:
     """
     global _db
     if _db is None:
-        _db = Database(database_url)
+        _db = Database(database_url, replica_urls, max_replica_lag)
 
 
 async def ping() -> None:
@@ -33,23 +42,72 @@ async def ping() -> None:
     await _db.ping()
 
 
-async def init_models() -> None:
+async def listen(channel: str, callback: Callable[[str], None]) -> None:
     """
-    Initialize all models
+    Call back with the payload of every NOTIFY on a channel, over a dedicated connection
+    :param channel:
+    :param callback:
     :return:
     """
     if _db is None:
         raise RuntimeError("backend.engine not initialized.")
-    await _db.init_models()
+    _listeners.append(await _db.listen(channel, callback))
+
+
+async def dispose() -> None:
+    """
+    Close the notification listeners and every pooled connection, last thing on shutdown
+    :return:
+    """
+    global _db
+    if _db is None:
+        return
+
+    for connection in _listeners:
+        try:
+            await connection.close()
+        except Exception as e:
+            print(f"Failed to close a notification listener -> {e}")
+    _listeners.clear()
+
+    await _db.dispose()
+    _db = None
+
+
+async def migrate() -> Tuple[int, int]:
+    """
+    Create the models and apply pending schema migrations
+    :return: the schema version before and after
+    """
+    if _db is None:
+        raise RuntimeError("backend.engine not initialized.")
+    return await _db.migrate()
+
+
+async def check_schema() -> None:
+    """
+    Fast boot check that the database is reachable and fully migrated
+    :return:
+    """
+    if _db is None:
+        raise RuntimeError("backend.engine not initialized.")
+    version = await _db.schema_version()
+    if version < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"schema is at version {version}, expected {SCHEMA_VERSION}. Run 'python potion.py migrate' first"
+        )
 
 
 @asynccontextmanager
-async def session() -> AsyncIterator[AsyncSession]:
+async def session(read_only: bool = False) -> AsyncIterator[AsyncSession]:
     """
     One-liner session usage: 'async with session() as db_session:'
+    Read-only sessions go to a replica within the lag limit when one is configured, else the primary.
+    They may not see writes from the last few seconds, so keep read-your-writes paths on the primary.
+    :param read_only:
     :return:
     """
     if _db is None:
         raise RuntimeError("backend.engine not initialized.")
-    async with _db.get_session() as db_session:
+    async with _db.get_session(read_only) as db_session:
         yield db_session
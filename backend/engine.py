@@ -1,22 +1,104 @@
 from __future__ import annotations
 
-import importlib
+import asyncio
+import itertools
+import time
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import AsyncIterator, Callable, Optional, Sequence, Tuple
 
 from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
-from backend.base import Base
+from backend.migrations import MIGRATIONS, SCHEMA_VERSION
 
+# Arbitrary key for the advisory lock serializing concurrent migrate runs
+_MIGRATION_LOCK = 7_205_316
 
-class Database:
+LAG_CHECK_INTERVAL = 5.0
+LAG_CHECK_TIMEOUT = 2.0
+
+# Zero when the replica has replayed everything it received, so an idle replica is not reported as lagging.
+# NULL without a streaming WAL receiver, a disconnected replica has replayed everything it received but is stale.
+# Without pg_read_all_stats the receiver's status reads as NULL, then only its presence is checked.
+_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class Replica:
     def __init__(self, database_url: str):
+        self.engine: AsyncEngine = create_async_engine(
+            database_url,
+            pool_size=5,
+            max_overflow=5,
+            pool_pre_ping=True,
+        )
+        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
+            bind=self.engine,
+            expire_on_commit=False,
+        )
+        # Unknown until the first check succeeds, unknown replicas are never routed to
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self._check: Optional[asyncio.Task] = None
+
+    async def _measure(self) -> None:
+        try:
+            async with self.engine.connect() as connection:
+                result = await asyncio.wait_for(connection.execute(_LAG_QUERY), LAG_CHECK_TIMEOUT)
+                lag = result.scalar()
+            if lag is None:
+                raise RuntimeError("no streaming WAL receiver")
+            self.lag = float(lag)
+        except Exception as e:
+            if self.lag is not None:
+                print(f"Read replica {self.engine.url.host} unavailable -> {e}")
+            self.lag = None
+        finally:
+            self.checked_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """
+        Start a background lag check when the last one is stale, never blocking the caller
+        :return:
+        """
+        if time.monotonic() - self.checked_at < LAG_CHECK_INTERVAL:
+            return
+        if self._check is None or self._check.done():
+            self._check = asyncio.ensure_future(self._measure())
+
+    def usable(self, max_lag: float) -> bool:
+        self.refresh()
+        return self.lag is not None and self.lag <= max_lag
+
+    async def dispose(self) -> None:
+        if self._check is not None:
+            self._check.cancel()
+        await self.engine.dispose()
+
+
+class Database:
+    def __init__(
+        self,
+        database_url: str,
+        replica_urls: Sequence[str] = (),
+        max_replica_lag: float = 2.0,
+    ):
         self.engine: AsyncEngine = create_async_engine(
             database_url,
             pool_size=10,
@@ -27,13 +109,38 @@ class Database:
             bind=self.engine,
             expire_on_commit=False,
         )
+        self.replicas = [Replica(url) for url in replica_urls]
+        self.max_replica_lag = max_replica_lag
+        self._next_replica = itertools.cycle(range(len(self.replicas)))
+
+    def pick_replica(self) -> Optional[Replica]:
+        """
+        Round robin over replicas within the lag limit, None routes to the primary
+        :return:
+        """
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next_replica)]
+            if replica.usable(self.max_replica_lag):
+                return replica
+        return None
 
     async def ping(self) -> None:
         async with self.session_factory() as db_session:
             await db_session.execute(text("SELECT 1"))
 
     @asynccontextmanager
-    async def get_session(self) -> AsyncIterator[AsyncSession]:
+    async def get_session(self, read_only: bool = False) -> AsyncIterator[AsyncSession]:
+        replica = self.pick_replica() if read_only else None
+        if replica is not None:
+            async with replica.session_factory() as db_session:
+                try:
+                    yield db_session
+                except Exception:
+                    # Stop routing to a replica that errors until its next lag check passes
+                    replica.lag = None
+                    raise
+            return
+
         async with self.session_factory() as db_session:
             try:
                 yield db_session
@@ -42,8 +149,40 @@ class Database:
                 await db_session.rollback()
                 raise
 
-    async def init_models(self) -> None:
-        importlib.import_module("models.punishment")
+    async def listen(self, channel: str, callback: Callable[[str], None]) -> AsyncConnection:
+        connection = await self.engine.connect()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.add_listener(
+            channel,
+            lambda _connection, _pid, _channel, payload: callback(payload),
+        )
+        return connection
+
+    async def dispose(self) -> None:
+        await asyncio.gather(*(replica.dispose() for replica in self.replicas))
+        await self.engine.dispose()
+
+    async def schema_version(self) -> int:
+        async with self.engine.connect() as connection:
+            try:
+                result = await connection.execute(text("SELECT version FROM potion_schema"))
+            except ProgrammingError:
+                return 0
+            return result.scalar() or 0
+
+    async def migrate(self) -> Tuple[int, int]:
+        async with self.engine.begin() as connection:
+            await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK})
+            await connection.execute(text("CREATE TABLE IF NOT EXISTS potion_schema (version INTEGER NOT NULL)"))
+
+            current = (await connection.execute(text("SELECT version FROM potion_schema"))).scalar()
+            if current is None:
+                current = 0
+                await connection.execute(text("INSERT INTO potion_schema (version) VALUES (0)"))
+
+            for step in MIGRATIONS[current:]:
+                await step(connection)
+
+            await connection.execute(text("UPDATE potion_schema SET version = :version"), {"version": SCHEMA_VERSION})
 
-        async with self.engine.begin() as session:
-            await session.run_sync(Base.metadata.create_all)
+        return current, SCHEMA_VERSION
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import importlib
+import os
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from backend.base import Base
+from core.helper import get_timezone
+
+MODELS = (
+    "models.punishment",
+    "models.guild_settings",
+    "models.rollup",
+    "models.offender_summary",
+)
+
+
+async def _create_models(connection: AsyncConnection) -> None:
+    for module in MODELS:
+        importlib.import_module(module)
+
+    await connection.run_sync(Base.metadata.create_all)
+
+
+async def _punishment_lookup_indexes(connection: AsyncConnection) -> None:
+    await connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_punishment_guild_active_id "
+            "ON punishment (guild_id, is_active, punishment_id)"
+        )
+    )
+    await connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_punishment_guild_user_id ON punishment (guild_id, user_id, punishment_id)")
+    )
+
+
+def _host_timezone() -> str:
+    """
+    Return the IANA name of the zone naive punishment times were written in, LEGACY_TIMEZONE overrides the host's
+    :return:
+    """
+    name = os.getenv("LEGACY_TIMEZONE") or os.getenv("TZ", "").lstrip(":")
+    if not name:
+        if not os.path.exists("/etc/localtime"):
+            # Without a local zone the C library, and so datetime.now(), runs in UTC
+            name = "UTC"
+        elif "zoneinfo/" in os.path.realpath("/etc/localtime"):
+            name = os.path.realpath("/etc/localtime").split("zoneinfo/", 1)[1]
+        elif os.path.exists("/etc/timezone"):
+            with open("/etc/timezone") as file:
+                name = file.read().strip()
+
+    try:
+        get_timezone(name)
+    except (KeyError, ValueError, OSError) as e:
+        raise RuntimeError(f"Cannot tell the host's time zone, set LEGACY_TIMEZONE to its IANA name -> {e}") from e
+    return name
+
+
+async def _punishment_timestamptz(connection: AsyncConnection) -> None:
+    # Existing naive values came from datetime.now(), so they are local time of the host the bot ran on
+    result = await connection.execute(
+        text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = 'punishment' AND data_type = 'timestamp without time zone'"
+        )
+    )
+    columns = result.scalars().all()
+    if not columns:
+        return
+
+    timezone = _host_timezone()
+    for column in columns:
+        await connection.execute(
+            text(
+                f"ALTER TABLE punishment ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE "
+                f"USING {column} AT TIME ZONE '{timezone}'"
+            )
+        )
+
+
+async def backfill_offender_summary(connection: AsyncConnection, user_id: Optional[int] = None) -> None:
+    """
+    Recompute offender summaries from the punishment table, leaving out failed actions
+    Idempotent, the benchmark seeder reruns it after inserting rows directly
+    :param connection:
+    :param user_id: recompute a single user rather than everyone
+    :return:
+    """
+    only_user = "AND user_id = CAST(:user_id AS BIGINT)" if user_id is not None else ""
+    parameters = {"user_id": user_id} if user_id is not None else {}
+
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO offender_summary (
+                user_id, bans, kicks, timeouts, warns,
+                last_action_at, last_punishment_type, last_guild_id, guild_ids
+            )
+            SELECT
+                user_id,
+                count(*) FILTER (WHERE punishment_type = 'BAN'),
+                count(*) FILTER (WHERE punishment_type = 'KICK'),
+                count(*) FILTER (WHERE punishment_type = 'TIMEOUT'),
+                count(*) FILTER (WHERE punishment_type = 'WARN'),
+                max(added_at),
+                (array_agg(punishment_type ORDER BY added_at DESC, punishment_id DESC))[1],
+                (array_agg(guild_id ORDER BY added_at DESC, punishment_id DESC))[1],
+                array_agg(DISTINCT guild_id)
+            FROM punishment
+            WHERE NOT failed {only_user}
+            GROUP BY user_id
+            ON CONFLICT (user_id) DO UPDATE SET
+                bans = excluded.bans,
+                kicks = excluded.kicks,
+                timeouts = excluded.timeouts,
+                warns = excluded.warns,
+                last_action_at = excluded.last_action_at,
+                last_punishment_type = excluded.last_punishment_type,
+                last_guild_id = excluded.last_guild_id,
+                guild_ids = excluded.guild_ids
+            """
+        ),
+        parameters,
+    )
+    # Users whose every action failed keep no summary
+    await connection.execute(
+        text(
+            f"""
+            DELETE FROM offender_summary
+            WHERE NOT EXISTS (
+                SELECT 1 FROM punishment
+                WHERE punishment.user_id = offender_summary.user_id AND NOT punishment.failed
+            ) {only_user}
+            """
+        ),
+        parameters,
+    )
+
+
+async def _punishment_failed(connection: AsyncConnection) -> None:
+    await connection.execute(
+        text("ALTER TABLE punishment ADD COLUMN IF NOT EXISTS failed BOOLEAN NOT NULL DEFAULT false")
+    )
+
+
+async def _guild_raid_response(connection: AsyncConnection) -> None:
+    for column, definition in (
+        ("raid_lockdown", "BOOLEAN NOT NULL DEFAULT true"),
+        ("raid_auto_timeout", "BOOLEAN NOT NULL DEFAULT true"),
+        ("raid_timeout_minutes", "INTEGER NOT NULL DEFAULT 60"),
+        ("raid_duration_minutes", "INTEGER NOT NULL DEFAULT 10"),
+    ):
+        await connection.execute(text(f"ALTER TABLE guild_settings ADD COLUMN IF NOT EXISTS {column} {definition}"))
+
+
+async def _offender_summary_backfill(connection: AsyncConnection) -> None:
+    # The backfill skips failed rows, so the column a later step adds has to exist already
+    await _punishment_failed(connection)
+    await backfill_offender_summary(connection)
+
+
+async def _punishment_reason_search(connection: AsyncConnection) -> None:
+    # Adding a stored generated column rewrites the table once
+    await connection.execute(
+        text(
+            "ALTER TABLE punishment ADD COLUMN IF NOT EXISTS reason_tsv TSVECTOR "
+            "GENERATED ALWAYS AS (to_tsvector('english', reason)) STORED"
+        )
+    )
+    await connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_punishment_reason_tsv ON punishment USING gin (reason_tsv)")
+    )
+    # Common terms are served newest first from here, so a term absent from one guild scans only that guild
+    await connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_punishment_guild_punishment_id ON punishment (guild_id, punishment_id)")
+    )
+
+
+# Ordered schema steps, the schema version is the number applied. Append only, never reorder.
+MIGRATIONS: List[Callable[[AsyncConnection], Awaitable[None]]] = [
+    _create_models,
+    _punishment_lookup_indexes,
+    _punishment_timestamptz,
+    # Re-running create_all adds the tables of newly listed models and skips existing ones
+    _create_models,  # guild_settings
+    _create_models,  # rollups
+    _create_models,  # offender_summary
+    _offender_summary_backfill,
+    _punishment_reason_search,
+    _punishment_failed,
+    _guild_raid_response,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
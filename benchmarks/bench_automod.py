@@ -0,0 +1,103 @@
+"""
+Throughput benchmark for the spam filter's per-message path in commands/automod.py.
+
+    python -m benchmarks.bench_automod --messages 500000
+"""
+import argparse
+import random
+import sys
+from types import SimpleNamespace
+from typing import List
+
+from benchmarks.stats import HEADER, measure_sync
+from commands.automod import SpamFilter, SpamTracker, fingerprint
+
+_WORDS = (
+    "anyone up for a game later tonight patch broke everything again check the pinned messages rules "
+    "does know when event starts got three wins in row lol gg brb nice build map queue ranked team"
+).split()
+_SPAM = "FREE NITRO claim now at discord-gift.example/{}"
+
+
+def _messages(count: int, guilds: int, users: int, spammers: int, seed: int) -> List[SimpleNamespace]:
+    """
+    Synthetic traffic: regular chatter from many users plus a few accounts repeating one link
+    :param count:
+    :param guilds:
+    :param users:
+    :param spammers:
+    :param seed:
+    :return:
+    """
+    rng = random.Random(seed)
+    permissions = SimpleNamespace(manage_messages=False, administrator=False)
+    guild_objects = [SimpleNamespace(id=1_000 + i) for i in range(guilds)]
+    channels = [SimpleNamespace(id=10_000 + i) for i in range(guilds * 5)]
+
+    messages = []
+    for _ in range(count):
+        spam = rng.randrange(100) < 2
+        user_id = rng.randrange(spammers) if spam else spammers + rng.randrange(users)
+        if spam:
+            # Spammers stay in one guild and hop between its channels
+            content = _SPAM.format(rng.randrange(10))
+            channel = channels[(user_id % guilds) * 5 + rng.randrange(5)]
+        else:
+            content = " ".join(rng.choices(_WORDS, k=rng.randrange(1, 12)))
+            channel = channels[rng.randrange(len(channels))]
+        messages.append(
+            SimpleNamespace(
+                guild=guild_objects[(channel.id - 10_000) // 5],
+                channel=channel,
+                author=SimpleNamespace(id=user_id, bot=False, guild_permissions=permissions),
+                content=content,
+                attachments=(),
+            )
+        )
+    return messages
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500_000)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--spammers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    messages = _messages(args.messages, args.guilds, args.users, args.spammers, args.seed)
+    contents = [message.content for message in messages]
+
+    # The tracker uses monotonic time, so the run covers however many windows it takes
+    spam_filter = SpamFilter(SimpleNamespace())
+    flagged = 0
+
+    def inspect(i: int) -> None:
+        nonlocal flagged
+        if spam_filter.inspect(messages[i]) is not None:
+            flagged += 1
+            spam_filter.tracker.forget(messages[i].guild.id, messages[i].author.id)
+
+    tracker = SpamTracker()
+    results = [
+        measure_sync("fingerprint", lambda i: fingerprint(contents[i]), args.messages),
+        measure_sync(
+            "SpamTracker.observe",
+            lambda i: tracker.observe(i / 10_000, 1, i % 1_000, i % args.users, i % 97),
+            args.messages,
+        ),
+        measure_sync("SpamFilter.inspect", inspect, args.messages),
+    ]
+
+    print(HEADER)
+    for result in results:
+        print(result.row())
+    print(
+        f"Flagged {flagged} message(s), tracking {len(spam_filter.tracker.users)} user(s) "
+        f"and {len(spam_filter.tracker.channels)} channel(s)"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+"""
+Fuzz check and throughput benchmark for core.helper.parse_duration.
+
+    python -m benchmarks.bench_duration --fuzz 20000 --iterations 100000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from datetime import timedelta
+from typing import List, Tuple
+
+from benchmarks.stats import HEADER, measure_sync
+from core.helper import _parse_duration_seconds, parse_duration
+
+_SPELLINGS = {
+    1: ("s", "sec", "secs", "second", "seconds"),
+    60: ("m", "min", "mins", "minute", "minutes"),
+    3_600: ("h", "hr", "hrs", "hour", "hours"),
+    86_400: ("d", "day", "days"),
+    604_800: ("w", "wk", "wks", "week", "weeks"),
+}
+
+
+def _valid_duration(rng: random.Random) -> Tuple[str, int]:
+    """
+    Build a random compound or ISO duration alongside its expected length in seconds
+    :param rng:
+    :return:
+    """
+    if rng.random() < 0.2:
+        weeks, days, hours, minutes, seconds = (rng.choice((0, rng.randrange(1, 100))) for _ in range(5))
+        weeks = weeks or 1
+        text = f"P{weeks}W" + (f"{days}D" if days else "")
+        if hours or minutes or seconds:
+            text += "T" + "".join(f"{v}{u}" for v, u in ((hours, "H"), (minutes, "M"), (seconds, "S")) if v)
+        return text, weeks * 604_800 + days * 86_400 + hours * 3_600 + minutes * 60 + seconds
+
+    parts, total = [], 0
+    for unit in rng.sample(list(_SPELLINGS), rng.randrange(1, 5)):
+        value = rng.randrange(1, 1_000)
+        total += value * unit
+        spelling = rng.choice(_SPELLINGS[unit])
+        if rng.random() < 0.1:
+            spelling = spelling.upper()
+        parts.append(f"{value}{rng.choice(('', ' '))}{spelling}")
+    return rng.choice(("", " ", ", ", " and ")).join(parts), total
+
+
+def fuzz(count: int, seed: int = 0) -> int:
+    """
+    Check valid inputs round trip and random garbage or long near-misses only ever raise ValueError, quickly
+    :param count:
+    :param seed:
+    :return: the number of cases checked
+    """
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + " ,.-:" + " "
+
+    for _ in range(count):
+        text, expected = _valid_duration(rng)
+        parsed = parse_duration(text)
+        assert parsed == timedelta(seconds=expected), (text, parsed, expected)
+
+        garbage = "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 40)))
+        # Many valid parts with a bad tail, random garbage almost never gets deep enough to backtrack
+        separator = rng.choice((" ", "  ", ", ", " and ", " , "))
+        repeated = separator.join(rng.choice(("1m", "2 h", "3d")) for _ in range(rng.randrange(2, 60)))
+        repeated += rng.choice(alphabet)
+
+        for text in garbage, repeated:
+            started = time.perf_counter()
+            try:
+                parse_duration(text)
+            except ValueError:
+                pass
+            assert time.perf_counter() - started < 0.01, f"slow parse for {text!r}"
+
+    return count * 3
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=20_000, help="random cases to check")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(f"Fuzzed {fuzz(args.fuzz)} cases")
+
+    rng = random.Random(1)
+    inputs = [_valid_duration(rng)[0] for _ in range(args.iterations)]
+    common = ["10m", "1h", "1d", "1d12h", "30 minutes", "PT1H", "7d", "1w"]
+
+    _parse_duration_seconds.cache_clear()
+    results = [
+        measure_sync("parse_duration distinct inputs", lambda i: parse_duration(inputs[i]), args.iterations),
+        measure_sync("parse_duration common inputs", lambda i: parse_duration(common[i % len(common)]), args.iterations),
+        measure_sync(
+            "uncached grammar",
+            lambda i: _parse_duration_seconds.__wrapped__(common[i % len(common)].lower()),
+            args.iterations,
+        ),
+    ]
+
+    print(HEADER)
+    for result in results:
+        print(result.row())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
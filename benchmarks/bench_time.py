@@ -0,0 +1,76 @@
+"""
+Microbenchmarks for the time helpers in core/helper.py.
+
+    python -m benchmarks.bench_time --iterations 100000
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import List
+from zoneinfo import ZoneInfo
+
+from benchmarks.stats import HEADER, Result, measure_sync
+from core.helper import UTC, format_given_time, format_given_times, get_timezone
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+
+def _legacy_format_given_time(time: datetime, datetime_format: str, timezone: str) -> str:
+    # The per-call pytz lookup the helpers used before the tz cache
+    target_tz = pytz.timezone(timezone)
+    if time.tzinfo is None:
+        aware = pytz.utc.localize(time)
+    else:
+        aware = time.astimezone(pytz.utc)
+    return aware.astimezone(target_tz).strftime(datetime_format)
+
+
+def run(iterations: int) -> List[Result]:
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    # A modlog export: many rows, clustered in time the way raids and spam waves are
+    times = [
+        start + timedelta(seconds=rng.randrange(0, 86_400 * 30, rng.choice((1, 60, 3_600))))
+        for _ in range(iterations)
+    ]
+    fmt, tz = "%d/%m/%y %H:%M", "Europe/London"
+
+    results = [
+        measure_sync("ZoneInfo.no_cache", lambda i: ZoneInfo.no_cache(tz), iterations),
+        measure_sync("get_timezone", lambda i: get_timezone(tz), iterations),
+        measure_sync("format_given_time", lambda i: format_given_time(times[i], fmt, tz), iterations),
+    ]
+
+    if pytz is not None:
+        results.append(
+            measure_sync(
+                "legacy pytz format_given_time",
+                lambda i: _legacy_format_given_time(times[i], fmt, tz),
+                iterations,
+            )
+        )
+
+    batch = measure_sync("format_given_times (whole batch)", lambda i: format_given_times(times, fmt, tz), 5)
+    # Report the batch per row so it lines up with the per-call rows
+    per_row = batch.percentile(50) / iterations
+    results.append(Result("format_given_times (per row)", [per_row] * iterations, batch.elapsed / 5))
+
+    return results
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(HEADER)
+    for result in run(args.iterations):
+        print(result.row())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+from typing import Optional
+
+_ids = itertools.count(1)
+
+
+class FakeHTTP:
+    """
+    Stand-in for the Discord REST layer, every call costs a fixed round trip
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def request(self) -> None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeMessage:
+    def __init__(self, http: FakeHTTP):
+        self.http = http
+        self.id = next(_ids)
+
+    async def edit(self, **kwargs) -> "FakeMessage":
+        await self.http.request()
+        return self
+
+    async def delete(self) -> None:
+        await self.http.request()
+
+
+class FakeUser:
+    def __init__(self, user_id: int, http: FakeHTTP):
+        self.id = user_id
+        self.http = http
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+        self.created_at = None
+
+    def __str__(self) -> str:
+        return f"user{self.id}"
+
+    async def send(self, *args, **kwargs) -> FakeMessage:
+        await self.http.request()
+        return FakeMessage(self.http)
+
+
+class FakeMember(FakeUser):
+    def __init__(self, user_id: int, guild: "FakeGuild", http: FakeHTTP):
+        super().__init__(user_id, http)
+        self.guild = guild
+        self.guild_permissions = SimpleNamespace(manage_messages=False, administrator=False)
+
+    async def kick(self, *, reason: Optional[str] = None) -> None:
+        await self.http.request()
+
+    async def timeout(self, duration, *, reason: Optional[str] = None) -> None:
+        await self.http.request()
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, http: FakeHTTP, name: str = "Benchmark Guild"):
+        self.id = guild_id
+        self.name = name
+        self.http = http
+        self._members = {}
+
+    def member(self, user_id: int) -> FakeMember:
+        member = self._members.get(user_id)
+        if member is None:
+            member = self._members[user_id] = FakeMember(user_id, self, self.http)
+        return member
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self._members.get(user_id)
+
+    async def ban(self, user, *, reason: Optional[str] = None, delete_message_days: int = 0) -> None:
+        await self.http.request()
+
+    async def unban(self, user, *, reason: Optional[str] = None) -> None:
+        await self.http.request()
+
+
+class FakeBot:
+    def __init__(self, http: FakeHTTP):
+        self.http = http
+        self.user = FakeUser(1, http)
+        self.guilds = []
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await self.http.request()
+        return FakeUser(user_id, self.http)
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        for guild in self.guilds:
+            if guild.id == guild_id:
+                return guild
+        return None
+
+
+class FakeContext:
+    """
+    Enough of commands.Context for the moderation commands, replies go through FakeHTTP
+    """
+
+    def __init__(self, bot: FakeBot, guild: FakeGuild, author: FakeMember):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.http = guild.http
+        self.interaction = None
+        self.replies = 0
+
+    async def defer(self, *, ephemeral: bool = False) -> None:
+        await self.http.request()
+
+    async def reply(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        self.replies += 1
+        await self.http.request()
+        return FakeMessage(self.http)
+
+    send = reply
@@ -0,0 +1,219 @@
+"""
+Offline benchmarks for the command path.
+
+Drives commands/moderation.py and master/compass.py against fake Discord objects and a local
+Postgres holding synthetic guilds, then reports throughput and p50/p99 latency.
+
+    POSTGRES=postgresql+asyncpg://... python -m benchmarks.run --rows 2000000 --http-latency 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import timedelta
+from typing import List
+
+from dotenv import load_dotenv
+
+from backend import db
+from benchmarks import seed
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeHTTP
+from benchmarks.stats import HEADER, Result, measure
+from commands.analytics import Analytics
+from commands.moderation import Moderation, SearchFlags
+from core.helper import retrieve_current_time
+from master import compass, pipeline
+from models.punishment_type import PunishmentType
+
+
+async def bench_compass(args: argparse.Namespace) -> List[Result]:
+    rng = random.Random(args.seed_value)
+    guild_ids = [seed.GUILD_BASE + i for i in range(args.guilds)]
+
+    def any_user() -> int:
+        return seed.USER_BASE + 1 + rng.randrange(args.users)
+
+    return [
+        await measure(
+            "compass.create_punishment",
+            lambda i: compass.create_punishment(
+                guild_id=rng.choice(guild_ids),
+                user_id=any_user(),
+                moderator_id=seed.MODERATOR_BASE,
+                punishment_type=PunishmentType.WARN,
+                reason="Benchmark",
+            ),
+            args.iterations,
+            args.concurrency,
+        ),
+        await measure(
+            "compass.get_user_punishments_page",
+            lambda i: compass.get_user_punishments_page(seed.GUILD_BASE, seed.HOT_USER_ID, limit=10),
+            args.iterations,
+            args.concurrency,
+        ),
+        await measure(
+            "compass.count_user_punishments",
+            lambda i: compass.count_user_punishments(seed.GUILD_BASE, seed.HOT_USER_ID),
+            args.iterations,
+            args.concurrency,
+        ),
+        await measure(
+            "compass.get_offender_summary",
+            lambda i: compass.get_offender_summary(any_user()),
+            args.iterations,
+            args.concurrency,
+        ),
+        await measure(
+            "compass.search_punishments",
+            lambda i: compass.search_punishments("phishing", guild_id=rng.choice(guild_ids), limit=11),
+            args.iterations,
+            args.concurrency,
+        ),
+        await measure(
+            "compass.get_guild_moderation_stats",
+            lambda i: compass.get_guild_moderation_stats(rng.choice(guild_ids)),
+            max(1, args.iterations // 10),
+            args.concurrency,
+        ),
+        await measure(
+            "compass.get_action_series",
+            lambda i: compass.get_action_series(
+                rng.choice(guild_ids),
+                retrieve_current_time() - timedelta(days=365),
+                "week",
+            ),
+            args.iterations,
+            args.concurrency,
+        ),
+    ]
+
+
+async def serial_punishment(action, **values):
+    """
+    The command path before master/pipeline: the Discord action, then the insert
+    :param action:
+    :param values:
+    :return:
+    """
+    applied = await action
+    punishment = await compass.create_punishment(**values)
+    return applied, punishment
+
+
+async def bench_commands(args: argparse.Namespace) -> List[Result]:
+    rng = random.Random(args.seed_value)
+    http = FakeHTTP(args.http_latency / 1000)
+    bot = FakeBot(http)
+    guilds = [FakeGuild(seed.GUILD_BASE + i, http) for i in range(args.guilds)]
+    bot.guilds = guilds
+    cog = Moderation(bot)
+    analytics = Analytics(bot)
+
+    def context() -> FakeContext:
+        guild = rng.choice(guilds)
+        return FakeContext(bot, guild, guild.member(seed.MODERATOR_BASE))
+
+    def target(ctx: FakeContext):
+        return ctx.guild.member(seed.USER_BASE + 1 + rng.randrange(args.users))
+
+    async def ban(i: int):
+        ctx = context()
+        await Moderation.ban.callback(cog, ctx, target(ctx), 0, reason="Benchmark")
+
+    async def warn(i: int):
+        ctx = context()
+        await Moderation.warn.callback(cog, ctx, target(ctx), reason="Benchmark")
+
+    async def modlog(i: int):
+        guild = guilds[0]
+        ctx = FakeContext(bot, guild, guild.member(seed.MODERATOR_BASE))
+        await Moderation.modlog.callback(cog, ctx, guild.member(seed.HOT_USER_ID), 10)
+
+    async def lookup(i: int):
+        ctx = context()
+        await Moderation.lookup.callback(cog, ctx, target(ctx))
+
+    # Parsed once like a prefix invocation would, the benchmark measures the command rather than flag parsing
+    parsing = context()
+    parsing.command = Moderation.search
+    parsing.current_parameter = Moderation.search.clean_params["flags"]
+    search_flags = await SearchFlags.convert(parsing, "phishing links")
+
+    async def search(i: int):
+        await Moderation.search.callback(cog, context(), flags=search_flags)
+
+    async def modstats(i: int):
+        await Moderation.modstats.callback(cog, context())
+
+    async def modtrends(i: int):
+        await Analytics.modtrends.callback(analytics, context(), 365)
+
+    results = [
+        await measure("command ban", ban, args.iterations, args.concurrency),
+        await measure("command warn", warn, args.iterations, args.concurrency),
+        await measure("command modlog", modlog, args.iterations, args.concurrency),
+        await measure("command lookup", lookup, args.iterations, args.concurrency),
+        await measure("command search", search, args.iterations, args.concurrency),
+        await measure("command modstats", modstats, max(1, args.iterations // 10), args.concurrency),
+        await measure("command modtrends", modtrends, args.iterations, args.concurrency),
+    ]
+
+    if args.serial:
+        concurrent = pipeline.run_punishment
+        pipeline.run_punishment = serial_punishment
+        try:
+            results += [
+                await measure("command ban (serial)", ban, args.iterations, args.concurrency),
+                await measure("command warn (serial)", warn, args.iterations, args.concurrency),
+            ]
+        finally:
+            pipeline.run_punishment = concurrent
+
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    load_dotenv(".env")
+    db.init(os.environ["POSTGRES"])
+    await db.migrate()
+
+    if args.clear:
+        await seed.clear()
+
+    if args.rows:
+        await seed.seed(args.rows, guilds=args.guilds, users=args.users)
+
+    while await compass.roll_up_punishments():
+        pass
+
+    results = []
+    if not args.commands_only:
+        results += await bench_compass(args)
+    if not args.compass_only:
+        results += await bench_commands(args)
+
+    print(HEADER)
+    for result in results:
+        print(result.row())
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=0, help="seed synthetic punishments up to this many rows")
+    parser.add_argument("--guilds", type=int, default=100, help="number of synthetic guilds")
+    parser.add_argument("--users", type=int, default=200_000, help="number of synthetic users")
+    parser.add_argument("--iterations", type=int, default=1_000, help="operations per benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent workers per benchmark")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="fake Discord round trip in milliseconds")
+    parser.add_argument("--seed-value", type=int, default=0, help="random seed for picking guilds and users")
+    parser.add_argument("--clear", action="store_true", help="delete synthetic rows before seeding")
+    parser.add_argument("--serial", action="store_true", help="also time ban and warn with the action and insert in series")
+    parser.add_argument("--compass-only", action="store_true")
+    parser.add_argument("--commands-only", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args(sys.argv[1:])))
@@ -0,0 +1,128 @@
+from sqlalchemy import text
+
+from backend import db
+from backend.migrations import backfill_offender_summary
+
+GUILD_BASE = 900_000_000_000_000_000
+USER_BASE = 800_000_000_000_000_000
+MODERATOR_BASE = 700_000_000_000_000_000
+
+HOT_USER_ID = USER_BASE
+HOT_USER_ROWS = 5_000
+
+_INSERT = text(
+    """
+    INSERT INTO punishment (guild_id, user_id, moderator_id, punishment_type, reason, added_at, expires_at, is_active)
+    SELECT
+        CAST(:guild_base AS BIGINT) + (g % CAST(:guilds AS BIGINT)),
+        CAST(:user_base AS BIGINT) + 1 + floor(random() * :users)::bigint,
+        CAST(:moderator_base AS BIGINT) + (g % CAST(:moderators AS BIGINT)),
+        (ARRAY['BAN', 'KICK', 'TIMEOUT', 'WARN'])[1 + (g % 4)]::punishment_type_enum,
+        (ARRAY['Spam', 'Phishing links', 'Harassment', 'Raiding', 'Off-topic', 'Slurs'])[1 + (g % 6)],
+        now() - random() * interval '365 days',
+        CASE WHEN g % 4 = 2 THEN now() + interval '1 day' END,
+        random() < 0.2
+    FROM generate_series(CAST(:start AS BIGINT), CAST(:stop AS BIGINT)) AS g
+    """
+)
+
+_INSERT_HOT_USER = text(
+    """
+    INSERT INTO punishment (guild_id, user_id, moderator_id, punishment_type, reason, added_at, is_active)
+    SELECT :guild_id, :user_id, CAST(:moderator_base AS BIGINT) + (g % 10), 'WARN'::punishment_type_enum,
+           'Benchmark history',
+           now() - g * interval '1 minute', false
+    FROM generate_series(1, :rows) AS g
+    """
+)
+
+
+async def existing_rows() -> int:
+    """
+    Count the synthetic rows already seeded
+    :return:
+    """
+    async with db.session() as session:
+        result = await session.execute(
+            text("SELECT count(*) FROM punishment WHERE guild_id >= :guild_base"),
+            {"guild_base": GUILD_BASE},
+        )
+        return result.scalar() or 0
+
+
+async def seed(
+    rows: int,
+    guilds: int = 100,
+    users: int = 200_000,
+    moderators: int = 50,
+    batch: int = 250_000,
+) -> int:
+    """
+    Generate synthetic punishments server side with generate_series, in batches
+    :param rows:
+    :param guilds:
+    :param users:
+    :param moderators:
+    :param batch:
+    :return: the number of rows inserted
+    """
+    existing = await existing_rows()
+    start = existing + 1
+
+    if existing == 0:
+        async with db.session() as session:
+            await session.execute(
+                _INSERT_HOT_USER,
+                {
+                    "guild_id": GUILD_BASE,
+                    "user_id": HOT_USER_ID,
+                    "moderator_base": MODERATOR_BASE,
+                    "rows": HOT_USER_ROWS,
+                },
+            )
+        start += HOT_USER_ROWS
+
+    inserted = 0
+    while start <= rows:
+        stop = min(rows, start + batch - 1)
+        async with db.session() as session:
+            await session.execute(
+                _INSERT,
+                {
+                    "guild_base": GUILD_BASE,
+                    "guilds": guilds,
+                    "user_base": USER_BASE,
+                    "users": users,
+                    "moderator_base": MODERATOR_BASE,
+                    "moderators": moderators,
+                    "start": start,
+                    "stop": stop,
+                },
+            )
+        inserted += stop - start + 1
+        start = stop + 1
+        print(f"Seeded {stop:,}/{rows:,} rows")
+
+    async with db.session() as session:
+        # Rows inserted here bypass create_punishment, so their offender summaries are rebuilt in one pass
+        await backfill_offender_summary(await session.connection())
+        await session.execute(text("ANALYZE punishment"))
+        await session.execute(text("ANALYZE offender_summary"))
+
+    return inserted
+
+
+async def clear() -> None:
+    """
+    Remove all synthetic rows
+    :return:
+    """
+    async with db.session() as session:
+        await session.execute(
+            text("DELETE FROM punishment WHERE guild_id >= :guild_base"),
+            {"guild_base": GUILD_BASE},
+        )
+        await session.execute(
+            text("DELETE FROM offender_summary WHERE user_id >= :user_base AND user_id < :guild_base"),
+            {"user_base": USER_BASE, "guild_base": GUILD_BASE},
+        )
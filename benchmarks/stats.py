@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+
+class Result:
+    def __init__(self, name: str, samples: List[float], elapsed: float):
+        self.name = name
+        self.samples = sorted(samples)
+        self.elapsed = elapsed
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        index = min(len(self.samples) - 1, int(round(pct / 100 * (len(self.samples) - 1))))
+        return self.samples[index]
+
+    @property
+    def throughput(self) -> float:
+        return len(self.samples) / self.elapsed if self.elapsed else 0.0
+
+    def row(self) -> str:
+        return (
+            f"{self.name:<32} {len(self.samples):>8} {self.throughput:>12.1f} "
+            f"{self.percentile(50) * 1000:>10.4f} {self.percentile(99) * 1000:>10.4f}"
+        )
+
+
+HEADER = f"{'benchmark':<32} {'ops':>8} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10}"
+
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable],
+    iterations: int,
+    concurrency: int = 1,
+) -> Result:
+    """
+    Run an async operation iterations times across concurrency workers, timing each call
+    :param name:
+    :param operation: called with the iteration number
+    :param iterations:
+    :param concurrency:
+    :return:
+    """
+    samples: List[float] = []
+    counter = iter(range(iterations))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            await operation(i)
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return Result(name, samples, time.perf_counter() - started)
+
+
+def measure_sync(name: str, operation: Callable[[int], object], iterations: int) -> Result:
+    """
+    Time a synchronous operation, for microbenchmarks of pure helpers
+    :param name:
+    :param operation: called with the iteration number
+    :param iterations:
+    :return:
+    """
+    samples: List[float] = []
+    perf_counter = time.perf_counter
+
+    started = perf_counter()
+    for i in range(iterations):
+        call_started = perf_counter()
+        operation(i)
+        samples.append(perf_counter() - call_started)
+    return Result(name, samples, perf_counter() - started)
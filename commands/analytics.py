@@ -0,0 +1,176 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from core.chart import render_bar_chart
+from core.helper import UTC, format_given_times, retrieve_current_time
+from master import compass, settings
+
+MAX_BUCKETS = 60
+
+_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+_LABELS = {
+    "hour": "%d %b %H:00",
+    "day": "%d %b",
+    "week": "%d %b",
+}
+
+
+def _granularity_for(days: int) -> str:
+    if days <= 2:
+        return "hour"
+    if days <= MAX_BUCKETS:
+        return "day"
+    return "week"
+
+
+def _first_bucket(since: datetime, granularity: str) -> datetime:
+    """
+    Align a start time to the UTC bucket boundary the rollups use
+    :param since:
+    :param granularity:
+    :return:
+    """
+    start = since.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+    if granularity != "hour":
+        start = start.replace(hour=0)
+    if granularity == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _humanize(delta: Optional[timedelta]) -> str:
+    if delta is None:
+        return "No repeat offenders"
+    if delta >= timedelta(days=1):
+        return f"{delta.total_seconds() / 86_400:.1f} days"
+    if delta >= timedelta(hours=1):
+        return f"{delta.total_seconds() / 3_600:.1f} hours"
+    return f"{max(delta.total_seconds() / 60, 1):.0f} minutes"
+
+
+class Analytics(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.hybrid_command(
+        name="modtrends",
+        description="View moderation trends over time",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.describe(days="How many days to look back (1-365)")
+    async def modtrends(
+        self,
+        ctx: commands.Context,
+        days: Optional[int] = 30,
+    ):
+        """
+        View moderation trends over time, served from the analytics rollups
+        :param ctx:
+        :param days:
+        :return:
+        """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
+        if days < 1 or days > 365:
+            await ctx.reply("Days must be between 1 and 365.")
+            return
+
+        granularity = _granularity_for(days)
+        now = retrieve_current_time()
+        since = _first_bucket(now - timedelta(days=days), granularity)
+
+        by_type, by_moderator, offenders, mean_gap = await asyncio.gather(
+            compass.get_action_series(ctx.guild.id, since, granularity),
+            compass.get_action_series(ctx.guild.id, since, granularity, by="moderator"),
+            compass.get_repeat_offenders(ctx.guild.id, since, limit=5),
+            compass.get_mean_time_between_offenses(ctx.guild.id, since),
+        )
+
+        if not by_type:
+            embed = discord.Embed(
+                title="📈 Moderation Trends",
+                description=f"No moderation actions in the last {days} day(s).",
+                color=config.embed_color,
+                timestamp=now,
+            )
+            await ctx.reply(embed=embed)
+            return
+
+        per_bucket: Dict[datetime, int] = Counter()
+        type_totals = Counter()
+        for bucket, punishment_type, count in by_type:
+            per_bucket[bucket] += count
+            type_totals[punishment_type] += count
+
+        step = _STEPS[granularity]
+        buckets: List[datetime] = []
+        bucket = since
+        while bucket <= now:
+            buckets.append(bucket)
+            bucket += step
+        buckets = buckets[-MAX_BUCKETS:]
+
+        labels = format_given_times(
+            buckets,
+            _LABELS[granularity],
+            config.timezone if granularity == "hour" else "UTC",
+        )
+        chart = render_bar_chart([(label, per_bucket.get(bucket, 0)) for label, bucket in zip(labels, buckets)])
+
+        embed = discord.Embed(
+            title="📈 Moderation Trends",
+            description=f"Actions per {granularity} over the last {days} day(s)\n```\n{chart}\n```",
+            color=config.embed_color,
+            timestamp=now,
+        )
+
+        embed.add_field(
+            name="📋 By Type",
+            value="\n".join(
+                f"{punishment_type.icon} **{punishment_type.value.title()}:** {count}"
+                for punishment_type, count in type_totals.most_common()
+            ),
+            inline=True,
+        )
+
+        moderator_totals = Counter()
+        for _, moderator_id, count in by_moderator:
+            moderator_totals[moderator_id] += count
+
+        embed.add_field(
+            name="👮 Top Moderators",
+            value="\n".join(f"<@{mod_id}>: {count}" for mod_id, count in moderator_totals.most_common(5)),
+            inline=True,
+        )
+
+        embed.add_field(
+            name="🔁 Repeat Offenders",
+            value="\n".join(f"<@{user_id}>: {count}" for user_id, count in offenders) or "None",
+            inline=False,
+        )
+
+        embed.add_field(
+            name="⏱️ Mean Time Between Offenses",
+            value=_humanize(mean_gap),
+            inline=False,
+        )
+
+        await ctx.reply(embed=embed)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Analytics(bot))
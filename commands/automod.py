@@ -0,0 +1,177 @@
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import timedelta
+from typing import Deque, Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+from master import pipeline, service, settings
+from models.punishment_type import PunishmentType
+
+SPAM_WINDOW = 8.0
+RATE_THRESHOLD = 8
+DUPLICATE_THRESHOLD = 4
+CHANNEL_DUPLICATE_THRESHOLD = 6
+SPAM_TIMEOUT = timedelta(minutes=10)
+
+MAX_TRACKED_USERS = 50_000
+MAX_TRACKED_CHANNELS = 10_000
+CHANNEL_HISTORY = 64
+MIN_DUPLICATE_LENGTH = 8
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff\u00ad"))
+_DIGITS = re.compile(r"\d+")
+
+
+def fingerprint(content: str, attachments: Tuple[Tuple[str, int], ...] = ()) -> int:
+    """
+    Hash a message after normalizing case, whitespace, invisible characters and numbers,
+    so trivially varied copies of the same message collide.
+    Short text-only messages return 0 and are never compared as duplicates.
+    :param content:
+    :param attachments: (filename, size) pairs
+    :return:
+    """
+    normalized = " ".join(_DIGITS.sub("0", content.translate(_ZERO_WIDTH).casefold()).split())
+    if not attachments and len(normalized) < MIN_DUPLICATE_LENGTH:
+        return 0
+    return hash((normalized, attachments)) or 1
+
+
+class SpamTracker:
+    """
+    Per user and per channel recent message fingerprints in bounded LRU maps.
+    Entries older than the window are dropped on access and idle keys are evicted oldest first.
+    """
+
+    def __init__(
+        self,
+        window: float = SPAM_WINDOW,
+        max_users: int = MAX_TRACKED_USERS,
+        max_channels: int = MAX_TRACKED_CHANNELS,
+    ):
+        self.window = window
+        self.max_users = max_users
+        self.max_channels = max_channels
+        self.users: "OrderedDict[Tuple[int, int], Deque[Tuple[float, int]]]" = OrderedDict()
+        self.channels: "OrderedDict[int, Deque[Tuple[float, int]]]" = OrderedDict()
+
+    @staticmethod
+    def _touch(store: OrderedDict, key, maxlen: int, limit: int, cutoff: float) -> Deque[Tuple[float, int]]:
+        history = store.get(key)
+        if history is None:
+            history = store[key] = deque(maxlen=maxlen)
+            while len(store) > limit:
+                store.popitem(last=False)
+        else:
+            store.move_to_end(key)
+            while history and history[0][0] < cutoff:
+                history.popleft()
+
+        # Drop keys that have been idle for a whole window, least recently used first
+        while store:
+            oldest = next(iter(store.values()))
+            if oldest and oldest[-1][0] >= cutoff:
+                break
+            if oldest is history:
+                break
+            store.popitem(last=False)
+
+        return history
+
+    def observe(self, now: float, guild_id: int, channel_id: int, user_id: int, digest: int) -> Optional[str]:
+        """
+        Record a message and return why it is spam, if it is
+        :param now:
+        :param guild_id:
+        :param channel_id:
+        :param user_id:
+        :param digest: the message fingerprint
+        :return:
+        """
+        cutoff = now - self.window
+
+        user = self._touch(self.users, (guild_id, user_id), RATE_THRESHOLD * 2, self.max_users, cutoff)
+        user.append((now, digest))
+
+        channel = self._touch(self.channels, channel_id, CHANNEL_HISTORY, self.max_channels, cutoff)
+        channel.append((now, digest))
+
+        if len(user) >= RATE_THRESHOLD:
+            return "Sending messages too quickly"
+        if not digest:
+            return None
+        if sum(1 for _, seen in user if seen == digest) >= DUPLICATE_THRESHOLD:
+            return "Repeated messages"
+        if sum(1 for _, seen in channel if seen == digest) >= CHANNEL_DUPLICATE_THRESHOLD:
+            return "Mass duplicated messages"
+        return None
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        self.users.pop((guild_id, user_id), None)
+
+
+class SpamFilter(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.tracker = SpamTracker()
+
+    def inspect(self, message: discord.Message) -> Optional[str]:
+        """
+        Return why a message is spam, if it is. Cheap enough to run on every message
+        :param message:
+        :return:
+        """
+        if message.guild is None or message.author.bot:
+            return None
+
+        if not settings.get(message.guild.id).automod:
+            return None
+
+        permissions = getattr(message.author, "guild_permissions", None)
+        if permissions is not None and (permissions.manage_messages or permissions.administrator):
+            return None
+
+        attachments = tuple((attachment.filename, attachment.size) for attachment in message.attachments)
+        return self.tracker.observe(
+            time.monotonic(),
+            message.guild.id,
+            message.channel.id,
+            message.author.id,
+            fingerprint(message.content, attachments),
+        )
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        reason = self.inspect(message)
+        if reason is None:
+            return
+
+        # Forget the history first so messages already in flight do not punish twice
+        self.tracker.forget(message.guild.id, message.author.id)
+
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+        await pipeline.run_punishment(
+            service.apply_timeout(
+                message.guild,
+                message.author,
+                SPAM_TIMEOUT,
+                reason,
+            ),
+            guild_id=message.guild.id,
+            user_id=message.author.id,
+            moderator_id=self.bot.user.id,
+            punishment_type=PunishmentType.TIMEOUT,
+            reason=f"Automod: {reason}",
+            expires_at=message.created_at + SPAM_TIMEOUT,
+        )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(SpamFilter(bot))
@@ -1,23 +1,57 @@
 from datetime import timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
 from core.helper import parse_duration, retrieve_current_time
-from master import compass, service
+from core.paginator import KeysetPaginator
+from master import compass, pipeline, service, settings
+from models.punishment import Punishment
 from models.punishment_type import PunishmentType
 
 
+class SearchFlags(commands.FlagConverter, case_insensitive=True):
+    """
+    Search words followed by optional filters, e.g. 419 scam type: ban moderator: @mod days: 7
+    """
+
+    query: str = commands.flag(
+        positional=True,
+        description='Words to search for, "quoted phrases" and -excluded words are supported',
+    )
+    punishment_type: Optional[PunishmentType] = commands.flag(
+        name="type",
+        default=None,
+        description="Only show this type of punishment",
+    )
+    moderator: Optional[discord.User] = commands.flag(
+        default=None,
+        description="Only show punishments issued by this moderator",
+    )
+    days: Optional[int] = commands.flag(
+        default=None,
+        description="Only show punishments from the last this many days",
+    )
+
+
 class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    @commands.command(
+    @commands.hybrid_command(
         name="ban",
         description="Ban a user from the server",
     )
+    @commands.guild_only()
     @commands.has_permissions(ban_members=True)
+    @app_commands.default_permissions(ban_members=True)
+    @app_commands.describe(
+        user="The user to ban",
+        delete_messages="Days of messages to delete (0-7)",
+        reason="Why the user is banned",
+    )
     async def ban(
         self,
         ctx: commands.Context,
@@ -34,6 +68,9 @@ class Moderation(commands.Cog):
         :param reason:
         :return:
         """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
         if delete_messages < 0 or delete_messages > 7:
             await ctx.reply("Delete messages must be between 0 and 7 days.")
             return
@@ -46,14 +83,13 @@ class Moderation(commands.Cog):
             await ctx.reply("I cannot ban myself.")
             return
 
-        await service.apply_ban(
-            ctx.guild,
-            user,
-            reason,
-            delete_messages,
-        )
-
-        await compass.create_punishment(
+        applied, punishment = await pipeline.run_punishment(
+            service.apply_ban(
+                ctx.guild,
+                user,
+                reason,
+                delete_messages,
+            ),
             guild_id=ctx.guild.id,
             user_id=user.id,
             moderator_id=ctx.author.id,
@@ -61,20 +97,44 @@ class Moderation(commands.Cog):
             reason=reason,
         )
 
+        if not applied:
+            await ctx.reply("I could not ban that user.")
+            return
+
         embed = discord.Embed(
             title="🔨 User Banned",
             description=f"**{user.mention}** has been banned from the server.",
-            color=0x393A41,
+            color=config.embed_color,
             timestamp=retrieve_current_time(),
         )
 
+        self._note_unlogged(embed, punishment)
         await ctx.reply(embed=embed)
 
-    @commands.command(
+    @staticmethod
+    def _note_unlogged(embed: discord.Embed, punishment: Optional[Punishment]) -> None:
+        """
+        Warn the moderator when an applied action could not be recorded
+        :param embed:
+        :param punishment:
+        :return:
+        """
+        if punishment is None:
+            embed.add_field(
+                name="⚠️ Not Logged",
+                value="The action was applied but could not be saved to the moderation log. "
+                "Please note it manually.",
+                inline=False,
+            )
+
+    @commands.hybrid_command(
         name="kick",
         description="Kick a member from the server",
     )
+    @commands.guild_only()
     @commands.has_permissions(kick_members=True)
+    @app_commands.default_permissions(kick_members=True)
+    @app_commands.describe(member="The member to kick", reason="Why the member is kicked")
     async def kick(
         self,
         ctx: commands.Context,
@@ -89,6 +149,9 @@ class Moderation(commands.Cog):
         :param reason:
         :return:
         """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
         if member.id == ctx.author.id:
             await ctx.reply("You cannot kick yourself.")
             return
@@ -97,13 +160,12 @@ class Moderation(commands.Cog):
             await ctx.reply("I cannot kick myself.")
             return
 
-        await service.apply_kick(
-            ctx.guild,
-            member,
-            reason,
-        )
-
-        await compass.create_punishment(
+        applied, punishment = await pipeline.run_punishment(
+            service.apply_kick(
+                ctx.guild,
+                member,
+                reason,
+            ),
             guild_id=ctx.guild.id,
             user_id=member.id,
             moderator_id=ctx.author.id,
@@ -111,20 +173,32 @@ class Moderation(commands.Cog):
             reason=reason,
         )
 
+        if not applied:
+            await ctx.reply("I could not kick that member.")
+            return
+
         embed = discord.Embed(
             title="👢 Member Kicked",
             description=f"**{member.mention}** has been kicked from the server.",
-            color=0x393A41,
+            color=config.embed_color,
             timestamp=retrieve_current_time(),
         )
 
+        self._note_unlogged(embed, punishment)
         await ctx.reply(embed=embed)
 
-    @commands.command(
+    @commands.hybrid_command(
         name="mute",
         description="Timeout a member",
     )
+    @commands.guild_only()
     @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.describe(
+        member="The member to time out",
+        duration="How long, e.g. 10m, 1d12h, 90 minutes",
+        reason="Why the member is timed out",
+    )
     async def mute(
         self,
         ctx: commands.Context,
@@ -141,6 +215,9 @@ class Moderation(commands.Cog):
         :param reason:
         :return:
         """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
         if member.id == ctx.author.id:
             await ctx.reply("You cannot mute yourself.")
             return
@@ -155,19 +232,19 @@ class Moderation(commands.Cog):
             await ctx.reply(f"Invalid duration format: {e}")
             return
 
-        if duration_delta > timedelta(days=28):
-            await ctx.reply("Timeout duration cannot exceed 28 days.")
+        if duration_delta > timedelta(days=config.max_timeout_days):
+            await ctx.reply(f"Timeout duration cannot exceed {config.max_timeout_days} days.")
             return
 
         expires_at = retrieve_current_time() + duration_delta
 
-        await service.apply_timeout(
-            member,
-            duration_delta,
-            reason,
-        )
-
-        await compass.create_punishment(
+        applied, punishment = await pipeline.run_punishment(
+            service.apply_timeout(
+                ctx.guild,
+                member,
+                duration_delta,
+                reason,
+            ),
             guild_id=ctx.guild.id,
             user_id=member.id,
             moderator_id=ctx.author.id,
@@ -176,20 +253,28 @@ class Moderation(commands.Cog):
             expires_at=expires_at,
         )
 
+        if not applied:
+            await ctx.reply("I could not mute that member.")
+            return
+
         embed = discord.Embed(
             title="🔇 Member Timed Out",
             description=f"**{member.mention}** has been timed out.",
-            color=0x393A41,
+            color=config.embed_color,
             timestamp=retrieve_current_time(),
         )
 
+        self._note_unlogged(embed, punishment)
         await ctx.reply(embed=embed)
 
-    @commands.command(
+    @commands.hybrid_command(
         name="warn",
         description="Warn a member",
     )
+    @commands.guild_only()
     @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.describe(member="The member to warn", reason="Why the member is warned")
     async def warn(
         self,
         ctx: commands.Context,
@@ -204,6 +289,9 @@ class Moderation(commands.Cog):
         :param reason:
         :return:
         """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
         if member.id == ctx.author.id:
             await ctx.reply("You cannot warn yourself.")
             return
@@ -212,12 +300,11 @@ class Moderation(commands.Cog):
             await ctx.reply("You cannot warn me.")
             return
 
-        await service.apply_warn(
-            member,
-            reason,
-        )
-
-        await compass.create_punishment(
+        applied, punishment = await pipeline.run_punishment(
+            service.apply_warn(
+                member,
+                reason,
+            ),
             guild_id=ctx.guild.id,
             user_id=member.id,
             moderator_id=ctx.author.id,
@@ -225,20 +312,105 @@ class Moderation(commands.Cog):
             reason=reason,
         )
 
+        if not applied:
+            await ctx.reply("I could not warn that member.")
+            return
+
         embed = discord.Embed(
             title="⚠️ Member Warned",
             description=f"**{member.mention}** has been warned.",
-            color=0x393A41,
+            color=config.embed_color,
             timestamp=retrieve_current_time(),
         )
 
+        self._note_unlogged(embed, punishment)
         await ctx.reply(embed=embed)
 
-    @commands.command(
+    @commands.hybrid_command(
+        name="pardon",
+        description="Revoke an active punishment",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.describe(punishment_id="The punishment to revoke")
+    async def pardon(
+        self,
+        ctx: commands.Context,
+        punishment_id: int,
+    ):
+        """
+        Revoke an active punishment, lifting bans and timeouts on Discord
+        :param ctx:
+        :param punishment_id:
+        :return:
+        """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
+        punishment = await compass.get_punishment(ctx.guild.id, punishment_id)
+
+        if punishment is None or not punishment.is_active:
+            await ctx.reply(f"No active punishment with ID {punishment_id}.")
+            return
+
+        lifted = True
+        if punishment.punishment_type == PunishmentType.BAN:
+            lifted = await service.remove_ban(ctx.guild, discord.Object(id=punishment.user_id))
+        elif punishment.punishment_type == PunishmentType.TIMEOUT:
+            member = ctx.guild.get_member(punishment.user_id)
+            if member is not None:
+                lifted = await service.remove_timeout(ctx.guild, member, reason=f"Pardoned by {ctx.author}")
+
+        # Left active when Discord refused, so the punishment can still be found and pardoned again
+        if not lifted:
+            await ctx.reply(f"I could not lift that {punishment.punishment_type.value}, punishment {punishment_id} is still active.")
+            return
+
+        await compass.deactivate_punishment(punishment_id)
+
+        embed = discord.Embed(
+            title="🕊️ Punishment Revoked",
+            description=f"{punishment.punishment_type.value.title()} **{punishment_id}** for <@{punishment.user_id}> has been revoked.",
+            color=config.embed_color,
+            timestamp=retrieve_current_time(),
+        )
+
+        await ctx.reply(embed=embed)
+
+    @pardon.autocomplete("punishment_id")
+    async def pardon_autocomplete(
+        self,
+        interaction: discord.Interaction,
+        current: str,
+    ) -> List[app_commands.Choice[int]]:
+        """
+        Suggest active punishment IDs for the guild, most recent first
+        :param interaction:
+        :param current:
+        :return:
+        """
+        punishments = await compass.search_active_punishment_ids(
+            guild_id=interaction.guild_id,
+            prefix=current.strip(),
+        )
+
+        return [
+            app_commands.Choice(
+                name=f"#{p.punishment_id} {p.punishment_type.value} {p.user_id} - {p.reason}"[:100],
+                value=p.punishment_id,
+            )
+            for p in punishments
+        ]
+
+    @commands.hybrid_command(
         name="modlog",
         description="View moderation history for a user",
     )
+    @commands.guild_only()
     @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.describe(user="The user to look up", limit="How many entries to show per page (1-25)")
     async def modlog(
         self,
         ctx: commands.Context,
@@ -252,47 +424,79 @@ class Moderation(commands.Cog):
         :param limit:
         :return:
         """
-        if limit < 1 or limit > 25:
-            await ctx.reply("Limit must be between 1 and 25.")
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
+        if limit < 1 or limit > config.modlog_limit:
+            await ctx.reply(f"Limit must be between 1 and {config.modlog_limit}.")
             return
 
-        punishments = await compass.get_user_punishments(
-            guild_id=ctx.guild.id,
-            user_id=user.id,
-        )
+        total = await compass.count_user_punishments(ctx.guild.id, user.id)
 
-        if not punishments:
+        if total == 0:
             embed = discord.Embed(
                 title="📋 Moderation Log",
                 description=f"**{user.mention}** has no moderation history.",
-                color=0x393A41,
+                color=config.embed_color,
                 timestamp=retrieve_current_time(),
             )
             await ctx.reply(embed=embed)
             return
 
-        punishments = punishments[:limit]
+        async def fetch_page(before_id: Optional[int], page_limit: int) -> List[Punishment]:
+            return await compass.get_user_punishments_page(
+                guild_id=ctx.guild.id,
+                user_id=user.id,
+                before_id=before_id,
+                limit=page_limit,
+            )
+
+        def render_page(punishments: List[Punishment], page: int) -> discord.Embed:
+            return self._render_modlog(user, punishments, page, limit, total, config.embed_color)
+
+        view = KeysetPaginator(ctx.author.id, fetch_page, render_page, page_size=limit)
+        embed = await view.start()
+
+        if view.single_page:
+            view.stop()
+            await ctx.reply(embed=embed)
+            return
+
+        view.message = await ctx.reply(embed=embed, view=view)
 
+    @staticmethod
+    def _render_modlog(
+        user: discord.User,
+        punishments: List[Punishment],
+        page: int,
+        page_size: int,
+        total: int,
+        color: int,
+    ) -> discord.Embed:
+        """
+        Render one page of a user's moderation history
+        :param user:
+        :param punishments:
+        :param page:
+        :param page_size:
+        :param total:
+        :param color:
+        :return:
+        """
         embed = discord.Embed(
             title="📋 Moderation Log",
             description=f"Moderation history for **{user.mention}**",
-            color=0x393A41,
+            color=color,
             timestamp=retrieve_current_time(),
         )
 
         for punishment in punishments:
-            moderator = await self.bot.fetch_user(punishment.moderator_id)
-
-            punishment_icon = {
-                PunishmentType.BAN: "🔨",
-                PunishmentType.KICK: "👢",
-                PunishmentType.TIMEOUT: "🔇",
-                PunishmentType.WARN: "⚠️",
-            }.get(punishment.punishment_type, "❓")
+            if punishment.failed:
+                status = "❌ Failed"
+            else:
+                status = "🟢 Active" if punishment.is_active else "⚫ Inactive"
 
-            status = "🟢 Active" if punishment.is_active else "⚫ Inactive"
-
-            field_value = f"**Moderator:** {moderator.mention}\n"
+            field_value = f"**Moderator:** <@{punishment.moderator_id}>\n"
             field_value += f"**Reason:** {punishment.reason}\n"
             field_value += f"**Status:** {status}\n"
             field_value += f"**Date:** <t:{int(punishment.added_at.timestamp())}:F>\n"
@@ -301,22 +505,194 @@ class Moderation(commands.Cog):
                 field_value += f"**Expires:** <t:{int(punishment.expires_at.timestamp())}:R>\n"
 
             embed.add_field(
-                name=f"{punishment_icon} {punishment.punishment_type.value.title()} (ID: {punishment.punishment_id})",
+                name=f"{punishment.punishment_type.icon} {punishment.punishment_type.value.title()} (ID: {punishment.punishment_id})",
                 value=field_value,
                 inline=False,
             )
 
-        embed.set_footer(
-            text=f"Showing {len(punishments)} of {len(await compass.get_user_punishments(ctx.guild.id, user.id))} total punishments"
+        first = page * page_size + 1
+        embed.set_footer(text=f"Showing {first}-{first + len(punishments) - 1} of {total} total punishments")
+
+        return embed
+
+    @commands.hybrid_command(
+        name="search",
+        description="Search punishment reasons in the server",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    async def search(self, ctx: commands.Context, *, flags: SearchFlags):
+        """
+        Search punishment reasons in the server, newest first
+        Filters follow the words as keyword flags, so a leading number is searched for rather than taken as days
+        :param ctx:
+        :param flags:
+        :return:
+        """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
+        query = flags.query
+
+        if flags.days is not None and flags.days < 1:
+            await ctx.reply("Days must be at least 1.")
+            return
+
+        since = retrieve_current_time() - timedelta(days=flags.days) if flags.days else None
+
+        async def fetch_page(before_id: Optional[int], page_limit: int) -> List[Punishment]:
+            return await compass.search_punishments(
+                query,
+                guild_id=ctx.guild.id,
+                punishment_type=flags.punishment_type,
+                moderator_id=flags.moderator.id if flags.moderator else None,
+                since=since,
+                before_id=before_id,
+                limit=page_limit,
+            )
+
+        def render_page(punishments: List[Punishment], page: int) -> discord.Embed:
+            return self._render_search(query, punishments, page, config.embed_color)
+
+        view = KeysetPaginator(ctx.author.id, fetch_page, render_page)
+        embed = await view.start()
+
+        if view.single_page:
+            view.stop()
+            await ctx.reply(embed=embed)
+            return
+
+        view.message = await ctx.reply(embed=embed, view=view)
+
+    @staticmethod
+    def _render_search(
+        query: str,
+        punishments: List[Punishment],
+        page: int,
+        color: int,
+    ) -> discord.Embed:
+        """
+        Render one page of reason search results
+        :param query:
+        :param punishments:
+        :param page:
+        :param color:
+        :return:
+        """
+        embed = discord.Embed(
+            title="🔎 Punishment Search",
+            description=f"Reasons matching **{discord.utils.escape_markdown(query)}**",
+            color=color,
+            timestamp=retrieve_current_time(),
+        )
+
+        if not punishments:
+            embed.description = f"No punishments match **{discord.utils.escape_markdown(query)}**."
+            return embed
+
+        for punishment in punishments:
+            field_value = f"**User:** <@{punishment.user_id}>\n"
+            field_value += f"**Moderator:** <@{punishment.moderator_id}>\n"
+            field_value += f"**Reason:** {punishment.reason}\n"
+            field_value += f"**Date:** <t:{int(punishment.added_at.timestamp())}:F>\n"
+
+            embed.add_field(
+                name=f"{punishment.punishment_type.icon} {punishment.punishment_type.value.title()} (ID: {punishment.punishment_id})",
+                value=field_value,
+                inline=False,
+            )
+
+        embed.set_footer(text=f"Page {page + 1}")
+
+        return embed
+
+    @commands.hybrid_command(
+        name="lookup",
+        description="View a user's punishments across every server",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.describe(user="The user to look up")
+    async def lookup(
+        self,
+        ctx: commands.Context,
+        user: discord.User,
+    ):
+        """
+        View a user's punishments across every server the bot moderates, served from the offender summary
+        :param ctx:
+        :param user:
+        :return:
+        """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
+        summary = await compass.get_offender_summary(user.id)
+
+        if summary is None:
+            embed = discord.Embed(
+                title="🌐 Network Lookup",
+                description=f"**{user.mention}** has no moderation history in any server.",
+                color=config.embed_color,
+                timestamp=retrieve_current_time(),
+            )
+            await ctx.reply(embed=embed)
+            return
+
+        embed = discord.Embed(
+            title="🌐 Network Lookup",
+            description=f"**{user.mention}** has been punished {summary.total} time(s) "
+            f"across {len(summary.guild_ids)} server(s)",
+            color=config.embed_color,
+            timestamp=retrieve_current_time(),
+        )
+
+        embed.add_field(
+            name="📋 By Type",
+            value="\n".join(
+                f"{punishment_type.icon} **{punishment_type.value.title()}:** {getattr(summary, column)}"
+                for punishment_type, column in compass.SUMMARY_COUNTS.items()
+            ),
+            inline=True,
+        )
+
+        last_guild = self.bot.get_guild(summary.last_guild_id)
+        embed.add_field(
+            name="🕒 Last Action",
+            value=f"{summary.last_punishment_type.icon} {summary.last_punishment_type.value.title()} in "
+            f"**{discord.utils.escape_markdown(last_guild.name) if last_guild else 'a server the bot has left'}**\n"
+            f"<t:{int(summary.last_action_at.timestamp())}:R>",
+            inline=True,
+        )
+
+        # Only servers the bot is still in are named
+        guilds = [guild for guild in map(self.bot.get_guild, summary.guild_ids) if guild is not None]
+        servers = "\n".join(
+            f"{'📍 ' if guild.id == ctx.guild.id else ''}{discord.utils.escape_markdown(guild.name)}"
+            for guild in guilds[:10]
+        )
+        if len(guilds) > 10:
+            servers += f"\n...and {len(guilds) - 10} more"
+        if len(guilds) < len(summary.guild_ids):
+            servers += f"\n{len(summary.guild_ids) - len(guilds)} server(s) the bot has left"
+
+        embed.add_field(
+            name="🏠 Servers",
+            value=servers,
+            inline=False,
         )
 
         await ctx.reply(embed=embed)
 
-    @commands.command(
+    @commands.hybrid_command(
         name="modstats",
         description="View moderation statistics for the server",
     )
+    @commands.guild_only()
     @commands.has_permissions(moderate_members=True)
+    @app_commands.default_permissions(moderate_members=True)
     async def modstats(
         self,
         ctx: commands.Context,
@@ -326,13 +702,16 @@ class Moderation(commands.Cog):
         :param ctx:
         :return:
         """
+        await ctx.defer()
+        config = settings.get(ctx.guild.id)
+
         stats = await compass.get_guild_moderation_stats(ctx.guild.id)
 
         if not stats or stats["total"] == 0:
             embed = discord.Embed(
                 title="📊 Moderation Statistics",
                 description="No moderation actions have been taken in this server.",
-                color=0x393A41,
+                color=config.embed_color,
                 timestamp=retrieve_current_time(),
             )
             await ctx.reply(embed=embed)
@@ -341,7 +720,7 @@ class Moderation(commands.Cog):
         embed = discord.Embed(
             title="📊 Moderation Statistics",
             description=f"Server-wide moderation statistics for **{ctx.guild.name}**",
-            color=0x393A41,
+            color=config.embed_color,
             timestamp=retrieve_current_time(),
         )
 
@@ -355,13 +734,7 @@ class Moderation(commands.Cog):
 
         type_breakdown = ""
         for punishment_type, count in stats["by_type"].items():
-            icon = {
-                PunishmentType.BAN: "🔨",
-                PunishmentType.KICK: "👢",
-                PunishmentType.TIMEOUT: "🔇",
-                PunishmentType.WARN: "⚠️",
-            }.get(punishment_type, "❓")
-            type_breakdown += f"{icon} **{punishment_type.value.title()}:** {count}\n"
+            type_breakdown += f"{punishment_type.icon} **{punishment_type.value.title()}:** {count}\n"
 
         embed.add_field(
             name="📋 By Type",
@@ -0,0 +1,170 @@
+from typing import Callable, Dict
+
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from core.helper import get_timezone, retrieve_current_time
+from master import settings
+from master.raid import WINDOW_CAPACITY
+
+
+def _bounded_int(low: int, high: int) -> Callable[[str], int]:
+    def parse(value: str) -> int:
+        number = int(value)
+        if number < low or number > high:
+            raise ValueError(f"must be between {low} and {high}")
+        return number
+
+    return parse
+
+
+def _prefix(value: str) -> str:
+    if not value or len(value) > 8 or any(char.isspace() for char in value):
+        raise ValueError("must be 1 to 8 characters without spaces")
+    return value
+
+
+def _color(value: str) -> int:
+    color = int(value.lstrip("#"), 16)
+    if color < 0 or color > 0xFFFFFF:
+        raise ValueError("must be a hex color like #393A41")
+    return color
+
+
+def _timezone(value: str) -> str:
+    try:
+        get_timezone(value)
+    except Exception:
+        raise ValueError("must be an IANA timezone like Europe/London")
+    return value
+
+
+def _flag(value: str) -> bool:
+    value = value.lower()
+    if value in ("on", "true", "yes", "enable", "enabled"):
+        return True
+    if value in ("off", "false", "no", "disable", "disabled"):
+        return False
+    raise ValueError("must be on or off")
+
+
+_PARSERS: Dict[str, Callable[[str], object]] = {
+    "prefix": _prefix,
+    "embed_color": _color,
+    "timezone": _timezone,
+    "max_timeout_days": _bounded_int(1, 28),
+    "modlog_limit": _bounded_int(1, 25),
+    "raid_protection": _flag,
+    "raid_join_threshold": _bounded_int(2, WINDOW_CAPACITY),
+    "raid_lockdown": _flag,
+    "raid_auto_timeout": _flag,
+    # Discord caps timeouts at 28 days
+    "raid_timeout_minutes": _bounded_int(1, 40_320),
+    "raid_duration_minutes": _bounded_int(1, 1_440),
+    "automod": _flag,
+}
+
+
+class Configuration(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        self.reload.start()
+
+    async def cog_unload(self):
+        self.reload.cancel()
+
+    @tasks.loop(minutes=5)
+    async def reload(self):
+        """
+        Periodically reload the whole snapshot in case a change notification was missed
+        :return:
+        """
+        try:
+            await settings.load()
+        except Exception as e:
+            print(f"Failed to reload guild settings -> {e}")
+
+    @reload.before_loop
+    async def before_reload(self):
+        await self.bot.wait_until_ready()
+
+    @commands.hybrid_group(
+        name="config",
+        description="View this server's settings",
+        fallback="show",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.default_permissions(manage_guild=True)
+    async def config(self, ctx: commands.Context):
+        """
+        View this server's settings
+        :param ctx:
+        :return:
+        """
+        config = settings.get(ctx.guild.id)
+
+        embed = discord.Embed(
+            title="⚙️ Server Settings",
+            description="\n".join(
+                f"**{key}:** `{f'#{value:06X}' if key == 'embed_color' else value}`"
+                for key, value in config._asdict().items()
+            ),
+            color=config.embed_color,
+            timestamp=retrieve_current_time(),
+        )
+
+        await ctx.reply(embed=embed)
+
+    @config.command(
+        name="set",
+        description="Change one of this server's settings",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.describe(key="The setting to change", value="The new value")
+    @app_commands.choices(key=[app_commands.Choice(name=key, value=key) for key in _PARSERS])
+    async def config_set(
+        self,
+        ctx: commands.Context,
+        key: str,
+        *,
+        value: str,
+    ):
+        """
+        Change one of this server's settings
+        :param ctx:
+        :param key:
+        :param value:
+        :return:
+        """
+        await ctx.defer()
+
+        parser = _PARSERS.get(key)
+        if parser is None:
+            await ctx.reply(f"Unknown setting `{key}`. Settings: {', '.join(_PARSERS)}")
+            return
+
+        try:
+            parsed = parser(value)
+        except ValueError as e:
+            await ctx.reply(f"Invalid value for `{key}`: {e}")
+            return
+
+        config = await settings.update(ctx.guild.id, **{key: parsed})
+
+        embed = discord.Embed(
+            title="⚙️ Setting Updated",
+            description=f"**{key}** is now `{value}`.",
+            color=config.embed_color,
+            timestamp=retrieve_current_time(),
+        )
+
+        await ctx.reply(embed=embed)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Configuration(bot))
@@ -0,0 +1,25 @@
+from typing import List, Sequence, Tuple
+
+_BLOCKS = " ▏▎▍▌▋▊▉█"
+
+
+def render_bar_chart(rows: Sequence[Tuple[str, int]], width: int = 20) -> str:
+    """
+    Render labelled counts as a horizontal unicode bar chart, for use inside a code block
+    :param rows: (label, count) pairs
+    :param width: characters used by the longest bar
+    :return:
+    """
+    if not rows:
+        return ""
+
+    peak = max(count for _, count in rows) or 1
+    label_width = max(len(label) for label, _ in rows)
+    lines: List[str] = []
+
+    for label, count in rows:
+        eighths = round(count / peak * width * 8)
+        bar = "█" * (eighths // 8) + (_BLOCKS[eighths % 8] if eighths % 8 else "")
+        lines.append(f"{label:<{label_width}} {bar:<{width}} {count}")
+
+    return "\n".join(lines)
@@ -1,11 +1,32 @@
-from datetime import datetime, timedelta
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
 
-import pytz
+UTC = dt_timezone.utc
+DEFAULT_TIMEZONE = "Europe/London"
+
+# Directives rendering below minute precision, their presence shrinks or disables batch reuse
+_SECOND_DIRECTIVES = ("%S", "%T", "%X", "%c", "%r", "%s")
+_SUB_SECOND_DIRECTIVES = ("%f",)
+
+
+@lru_cache(maxsize=64)
+def get_timezone(timezone: str) -> tzinfo:
+    """
+    Return the tz object for an IANA name, cached
+    :param timezone:
+    :return:
+    """
+    if timezone.upper() == "UTC":
+        return UTC
+    return ZoneInfo(timezone)
 
 
 def retrieve_current_formatted_time(
     datetime_format: str = "%d %B %Y %H:%M",
-    timezone: str = "Europe/London",
+    timezone: str = DEFAULT_TIMEZONE,
 ) -> str:
     """
     Return the current time formatted
@@ -13,26 +34,25 @@ def retrieve_current_formatted_time(
     :param timezone:
     :return:
     """
-    now = datetime.now(pytz.timezone(timezone))
+    now = datetime.now(get_timezone(timezone))
     return now.strftime(datetime_format)
 
 
-def retrieve_current_time_with_timezone(timezone: str = "Europe/London") -> datetime:
+def retrieve_current_time_with_timezone(timezone: str = DEFAULT_TIMEZONE) -> datetime:
     """
     Return the current datetime in the specified timezone
     :param timezone:
     :return:
     """
-    tz = pytz.timezone(timezone)
-    return datetime.now(tz)
+    return datetime.now(get_timezone(timezone))
 
 
 def retrieve_current_time() -> datetime:
     """
-    Return the current datetime
+    Return the current UTC datetime, timezone aware
     :return:
     """
-    return datetime.now()
+    return datetime.now(UTC)
 
 
 def to_discord_timestamp(dt: datetime, style: str = "F") -> str:
@@ -47,7 +67,7 @@ def to_discord_timestamp(dt: datetime, style: str = "F") -> str:
 def format_given_time(
     time: datetime,
     datetime_format: str = "%d/%m/%y %H:%M",
-    timezone: str = "Europe/London",
+    timezone: str = DEFAULT_TIMEZONE,
 ) -> str:
     """
     Render a datetime in the given timezone - Treated as UTC
@@ -56,18 +76,96 @@ def format_given_time(
     :param timezone:
     :return:
     """
-    target_tz = pytz.timezone(timezone)
     if time.tzinfo is None:
-        aware = pytz.utc.localize(time)
+        time = time.replace(tzinfo=UTC)
+    return time.astimezone(get_timezone(timezone)).strftime(datetime_format)
+
+
+def format_given_times(
+    times: Iterable[Optional[datetime]],
+    datetime_format: str = "%d/%m/%y %H:%M",
+    timezone: str = DEFAULT_TIMEZONE,
+) -> List[str]:
+    """
+    Render many datetimes in one pass - Naive values treated as UTC, None renders empty.
+    The timezone is resolved once and values falling in the same rendered unit reuse the string.
+    :param times:
+    :param datetime_format:
+    :param timezone:
+    :return:
+    """
+    target_tz = get_timezone(timezone)
+
+    if any(directive in datetime_format for directive in _SUB_SECOND_DIRECTIVES):
+        resolution = 0
+    elif any(directive in datetime_format for directive in _SECOND_DIRECTIVES):
+        resolution = 1
     else:
-        aware = time.astimezone(pytz.utc)
-    return aware.astimezone(target_tz).strftime(datetime_format)
+        resolution = 60
+
+    rendered: Dict[int, str] = {}
+    formatted = []
+
+    for time in times:
+        if time is None:
+            formatted.append("")
+            continue
+
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=UTC)
+
+        if not resolution:
+            formatted.append(time.astimezone(target_tz).strftime(datetime_format))
+            continue
+
+        key = int(time.timestamp()) // resolution
+        text = rendered.get(key)
+        if text is None:
+            text = rendered[key] = time.astimezone(target_tz).strftime(datetime_format)
+        formatted.append(text)
+
+    return formatted
+
+
+_UNIT_SECONDS = {
+    **dict.fromkeys(("s", "sec", "secs", "second", "seconds"), 1),
+    **dict.fromkeys(("m", "min", "mins", "minute", "minutes"), 60),
+    **dict.fromkeys(("h", "hr", "hrs", "hour", "hours"), 3_600),
+    **dict.fromkeys(("d", "day", "days"), 86_400),
+    **dict.fromkeys(("w", "wk", "wks", "week", "weeks"), 604_800),
+}
+
+# Longest aliases first so "min" is not read as "m" followed by garbage
+_UNIT = "|".join(sorted(_UNIT_SECONDS, key=len, reverse=True))
+_DURATION_PART = re.compile(rf"(\d+)\s*({_UNIT})")
+# Whitespace after a part is only consumed once, before the optional separator, or failed matches backtrack exponentially
+_COMPOUND_DURATION = re.compile(rf"(?:\d+\s*(?:{_UNIT})\s*(?:(?:,|and)\s*)?)+")
+_ISO_DURATION = re.compile(r"p(?:(\d+)w)?(?:(\d+)d)?(?:t(?=\d)(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?)?")
+_ISO_SECONDS = (604_800, 86_400, 3_600, 60, 1)
+
+
+@lru_cache(maxsize=1024)
+def _parse_duration_seconds(duration_str: str) -> int:
+    """
+    Parse a normalized duration string into seconds, cached per distinct input
+    :param duration_str:
+    :return:
+    """
+    iso = _ISO_DURATION.fullmatch(duration_str)
+    if iso is not None and duration_str != "p":
+        return sum(int(value) * unit for value, unit in zip(iso.groups(), _ISO_SECONDS) if value)
+
+    if _COMPOUND_DURATION.fullmatch(duration_str) is None:
+        raise ValueError("Invalid duration format. Use format like: 10m, 1d12h, 90 minutes, PT1H")
+
+    return sum(int(value) * _UNIT_SECONDS[unit] for value, unit in _DURATION_PART.findall(duration_str))
 
 
 def parse_duration(duration_str: str) -> timedelta:
     """
     Parse duration string into timedelta
-    Supported formats: 10s, 5m, 2h, 1d
+    Supported formats: 10s, 5m, 2h, 1d, 1w, compounds like 1d12h30m or 1 day, 2 hours and
+    long-form units like 90 minutes, and ISO-8601 durations like PT1H or P1W2D
     :param duration_str:
     :return:
     """
@@ -76,22 +174,12 @@ def parse_duration(duration_str: str) -> timedelta:
     if len(duration_str) < 2:
         raise ValueError("Duration too short")
 
-    unit = duration_str[-1]
-    try:
-        value = int(duration_str[:-1])
-    except ValueError:
-        raise ValueError("Invalid duration format. Use format like: 10s, 5m, 2h, 1d")
+    seconds = _parse_duration_seconds(duration_str)
 
-    if value <= 0:
+    if seconds <= 0:
         raise ValueError("Duration must be positive")
 
-    if unit == "s":
-        return timedelta(seconds=value)
-    elif unit == "m":
-        return timedelta(minutes=value)
-    elif unit == "h":
-        return timedelta(hours=value)
-    elif unit == "d":
-        return timedelta(days=value)
-    else:
-        raise ValueError(f"Unknown unit: {unit}. Use s, m, h, or d")
+    try:
+        return timedelta(seconds=seconds)
+    except OverflowError:
+        raise ValueError("Duration too long")
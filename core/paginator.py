@@ -0,0 +1,139 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from models.punishment import Punishment
+
+FetchPage = Callable[[Optional[int], int], Awaitable[List[Punishment]]]
+RenderPage = Callable[[List[Punishment], int], discord.Embed]
+
+
+class KeysetPaginator(discord.ui.View):
+    """
+    Button driven paginator over punishments, newest first.
+    Pages are fetched on demand with a punishment_id cursor, the next page is
+    prefetched in the background and rendered embeds are kept for the view's lifetime.
+    """
+
+    def __init__(
+        self,
+        author_id: int,
+        fetch_page: FetchPage,
+        render_page: RenderPage,
+        page_size: int = 10,
+        timeout: float = 180,
+    ):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.fetch_page = fetch_page
+        self.render_page = render_page
+        self.page_size = page_size
+
+        self.page = 0
+        self.message: Optional[discord.Message] = None
+
+        self._cursors: List[Optional[int]] = [None]
+        self._has_next: Dict[int, bool] = {}
+        self._pages: Dict[int, asyncio.Task] = {}
+
+    @property
+    def single_page(self) -> bool:
+        return self.page == 0 and not self._has_next.get(0, False)
+
+    async def _fetch(self, index: int) -> discord.Embed:
+        """
+        Fetch and render one page, recording the cursor of the page after it
+        :param index:
+        :return:
+        """
+        rows = await self.fetch_page(self._cursors[index], self.page_size + 1)
+        has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        self._has_next[index] = has_next
+        if has_next and len(self._cursors) == index + 1:
+            self._cursors.append(rows[-1].punishment_id)
+
+        return self.render_page(rows, index)
+
+    def _discard_failed(self, index: int, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            if self._pages.get(index) is task:
+                del self._pages[index]
+
+    def _load(self, index: int) -> asyncio.Task:
+        """
+        Return the cached task rendering a page, starting it if needed
+        :param index:
+        :return:
+        """
+        task = self._pages.get(index)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(index))
+            task.add_done_callback(lambda done: self._discard_failed(index, done))
+            self._pages[index] = task
+        return task
+
+    def _prefetch_next(self) -> None:
+        if self._has_next.get(self.page) and len(self._cursors) > self.page + 1:
+            self._load(self.page + 1)
+
+    def _refresh_buttons(self) -> None:
+        self.previous.disabled = self.page == 0
+        self.next.disabled = not self._has_next.get(self.page, False)
+
+    async def start(self) -> discord.Embed:
+        """
+        Load the first page and begin prefetching the second
+        :return:
+        """
+        embed = await self._load(0)
+        self._refresh_buttons()
+        self._prefetch_next()
+        return embed
+
+    async def _show(self, interaction: discord.Interaction, index: int) -> None:
+        task = self._load(index)
+
+        if task.done():
+            embed = task.result()
+            self.page = index
+            self._refresh_buttons()
+            await interaction.response.edit_message(embed=embed, view=self)
+        else:
+            await interaction.response.defer()
+            embed = await task
+            self.page = index
+            self._refresh_buttons()
+            await interaction.edit_original_response(embed=embed, view=self)
+
+        self._prefetch_next()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the moderator who ran this can page through it.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self) -> None:
+        for task in self._pages.values():
+            task.cancel()
+        self._pages.clear()
+
+        for item in self.children:
+            item.disabled = True
+
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
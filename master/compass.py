@@ -1,12 +1,82 @@
-from datetime import datetime
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Tuple
 
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, insert, delete, func, case, extract, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from backend import db
+from backend.migrations import backfill_offender_summary
+from core.helper import retrieve_current_time
+from models.guild_settings import GuildSettings
+from models.offender_summary import OffenderSummary
 from models.punishment import Punishment
+from models.rollup import OffenderRollupDaily, PunishmentRollupDaily, PunishmentRollupHourly, RollupState
 from models.punishment_type import PunishmentType
 
+SETTINGS_CHANNEL = "potion_guild_settings"
+
+# Rows younger than this are left for the next run, so IDs committed slightly out of order are not skipped
+ROLLUP_SETTLE = timedelta(minutes=1)
+_ROLLUP_LOCK = 7_205_317
+
+# Offender summary counter column for each punishment type
+SUMMARY_COUNTS = {
+    PunishmentType.BAN: "bans",
+    PunishmentType.KICK: "kicks",
+    PunishmentType.TIMEOUT: "timeouts",
+    PunishmentType.WARN: "warns",
+}
+
+
+def _summarize(punishments: List[Dict]):
+    """
+    Build the offender summary upsert for punishments being inserted
+    Entries are folded per user first, one statement cannot update the same row twice
+    :param punishments: punishment column values, added_at included
+    :return:
+    """
+    summaries: Dict[int, Dict] = {}
+    for punishment in punishments:
+        summary = summaries.get(punishment["user_id"])
+        if summary is None:
+            summary = summaries[punishment["user_id"]] = {
+                "user_id": punishment["user_id"],
+                **dict.fromkeys(SUMMARY_COUNTS.values(), 0),
+                "last_action_at": punishment["added_at"],
+                "guild_ids": [],
+            }
+
+        summary[SUMMARY_COUNTS[punishment["punishment_type"]]] += 1
+        if punishment["added_at"] >= summary["last_action_at"]:
+            summary["last_action_at"] = punishment["added_at"]
+            summary["last_punishment_type"] = punishment["punishment_type"]
+            summary["last_guild_id"] = punishment["guild_id"]
+        if punishment["guild_id"] not in summary["guild_ids"]:
+            summary["guild_ids"].append(punishment["guild_id"])
+
+    # Rows are locked in user_id order so concurrent batches cannot deadlock
+    stmt = pg_insert(OffenderSummary).values([summaries[user_id] for user_id in sorted(summaries)])
+    newer = stmt.excluded.last_action_at >= OffenderSummary.last_action_at
+
+    return stmt.on_conflict_do_update(
+        index_elements=[OffenderSummary.user_id],
+        set_={
+            **{
+                column: getattr(OffenderSummary, column) + getattr(stmt.excluded, column)
+                for column in SUMMARY_COUNTS.values()
+            },
+            "last_action_at": func.greatest(OffenderSummary.last_action_at, stmt.excluded.last_action_at),
+            "last_punishment_type": case(
+                (newer, stmt.excluded.last_punishment_type),
+                else_=OffenderSummary.last_punishment_type,
+            ),
+            "last_guild_id": case((newer, stmt.excluded.last_guild_id), else_=OffenderSummary.last_guild_id),
+            "guild_ids": literal_column(
+                "ARRAY(SELECT DISTINCT unnest(offender_summary.guild_ids || excluded.guild_ids))"
+            ),
+        },
+    )
+
 
 async def create_punishment(
     guild_id: int,
@@ -17,7 +87,7 @@ async def create_punishment(
     expires_at: Optional[datetime] = None,
 ) -> Punishment:
     """
-    Create a new punishment record in the database
+    Create a new punishment record in the database, updating the user's offender summary in the same transaction
     :param guild_id:
     :param user_id:
     :param moderator_id:
@@ -27,23 +97,45 @@ async def create_punishment(
     :return:
     """
     async with db.session() as session:
-        punishment = Punishment(
-            guild_id=guild_id,
-            user_id=user_id,
-            moderator_id=moderator_id,
-            punishment_type=punishment_type,
-            reason=reason,
-            expires_at=expires_at,
-            is_active=True,
-        )
+        values = {
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "moderator_id": moderator_id,
+            "punishment_type": punishment_type,
+            "reason": reason,
+            "added_at": retrieve_current_time(),
+            "expires_at": expires_at,
+        }
+        punishment = Punishment(**values, is_active=True)
 
         session.add(punishment)
+        await session.execute(_summarize([values]))
         await session.commit()
         await session.refresh(punishment)
 
         return punishment
 
 
+async def create_punishments(punishments: List[Dict]) -> int:
+    """
+    Insert many punishment records in a single statement, for automated batch actions
+    Each entry takes the create_punishment keyword arguments
+    :param punishments:
+    :return:
+    """
+    if not punishments:
+        return 0
+
+    now = retrieve_current_time()
+    rows = [{"is_active": True, "added_at": now, **punishment} for punishment in punishments]
+
+    async with db.session() as session:
+        await session.execute(insert(Punishment), rows)
+        await session.execute(_summarize(rows))
+
+    return len(punishments)
+
+
 async def get_user_punishments(
     guild_id: int,
     user_id: int,
@@ -58,7 +150,7 @@ async def get_user_punishments(
     :param punishment_type:
     :return:
     """
-    async with db.session() as session:
+    async with db.session(read_only=True) as session:
         query = select(Punishment).where(
             Punishment.guild_id == guild_id,
             Punishment.user_id == user_id,
@@ -76,28 +168,280 @@ async def get_user_punishments(
         return list(result.scalars().all())
 
 
-async def deactivate_punishment(punishment_id: int) -> bool:
+async def get_user_punishments_page(
+    guild_id: int,
+    user_id: int,
+    before_id: Optional[int] = None,
+    limit: int = 10,
+) -> List[Punishment]:
     """
-    Mark a punishment as inactive
+    Get one page of punishments for a user in a guild, newest first.
+    Keyset paginated on punishment_id, pass the last ID of the previous page as before_id.
+    :param guild_id:
+    :param user_id:
+    :param before_id:
+    :param limit:
+    :return:
+    """
+    async with db.session(read_only=True) as session:
+        query = select(Punishment).where(
+            Punishment.guild_id == guild_id,
+            Punishment.user_id == user_id,
+        )
+
+        if before_id is not None:
+            query = query.where(Punishment.punishment_id < before_id)
+
+        query = query.order_by(Punishment.punishment_id.desc()).limit(limit)
+
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+
+async def count_user_punishments(guild_id: int, user_id: int) -> int:
+    """
+    Count all punishments for a user in a guild
+    :param guild_id:
+    :param user_id:
+    :return:
+    """
+    async with db.session(read_only=True) as session:
+        query = select(func.count(Punishment.punishment_id)).where(
+            Punishment.guild_id == guild_id,
+            Punishment.user_id == user_id,
+        )
+        result = await session.execute(query)
+        return result.scalar() or 0
+
+
+async def get_punishment(guild_id: int, punishment_id: int) -> Optional[Punishment]:
+    """
+    Get a single punishment in a guild by its ID
+    :param guild_id:
     :param punishment_id:
     :return:
     """
     async with db.session() as session:
-        stmt = update(Punishment).where(
+        query = select(Punishment).where(
+            Punishment.guild_id == guild_id,
             Punishment.punishment_id == punishment_id,
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+
+async def search_active_punishment_ids(
+    guild_id: int,
+    prefix: str = "",
+    limit: int = 25,
+) -> List[Punishment]:
+    """
+    Get the most recent active punishments in a guild whose ID starts with prefix.
+    IDs starting with a prefix fall in one range per extra digit, prefix * 10^k up to (prefix + 1) * 10^k.
+    Each range is scanned newest first through the (guild_id, is_active, punishment_id) index, longest IDs first,
+    stopping once the limit is filled.
+    :param guild_id:
+    :param prefix:
+    :param limit:
+    :return:
+    """
+    async with db.session(read_only=True) as session:
+        query = select(Punishment).where(
+            Punishment.guild_id == guild_id,
             Punishment.is_active == True,
         )
+
+        if not prefix.isdigit():
+            result = await session.execute(query.order_by(Punishment.punishment_id.desc()).limit(limit))
+            return list(result.scalars().all())
+
+        # IDs never start with a zero
+        start = int(prefix)
+        newest = (await session.execute(select(func.max(Punishment.punishment_id)))).scalar()
+        if not start or newest is None:
+            return []
+
+        punishments: List[Punishment] = []
+        for digits in range(len(str(newest)) - len(prefix), -1, -1):
+            scale = 10**digits
+            result = await session.execute(
+                query.where(
+                    Punishment.punishment_id >= start * scale,
+                    Punishment.punishment_id < (start + 1) * scale,
+                )
+                .order_by(Punishment.punishment_id.desc())
+                .limit(limit - len(punishments))
+            )
+            punishments.extend(result.scalars().all())
+            if len(punishments) >= limit:
+                break
+
+        return punishments
+
+
+async def search_punishments(
+    query: str,
+    guild_id: Optional[int] = None,
+    punishment_type: Optional[PunishmentType] = None,
+    moderator_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = 10,
+) -> List[Punishment]:
+    """
+    Full text search over punishment reasons, newest first.
+    The query takes web search syntax ("quoted phrases", or, -excluded). Rare terms are matched through
+    the GIN index on reason_tsv, common ones by walking (guild_id, punishment_id) newest first.
+    Keyset paginated on punishment_id like get_user_punishments_page.
+    :param query:
+    :param guild_id:
+    :param punishment_type:
+    :param moderator_id:
+    :param since:
+    :param until:
+    :param before_id:
+    :param limit:
+    :return:
+    """
+    tsquery = func.websearch_to_tsquery("english", query)
+
+    async with db.session(read_only=True) as session:
+        statement = select(Punishment).where(Punishment.reason_tsv.op("@@")(tsquery))
+
+        if guild_id is not None:
+            statement = statement.where(Punishment.guild_id == guild_id)
+
+        if punishment_type:
+            statement = statement.where(Punishment.punishment_type == punishment_type)
+
+        if moderator_id is not None:
+            statement = statement.where(Punishment.moderator_id == moderator_id)
+
+        if since is not None:
+            statement = statement.where(Punishment.added_at >= since)
+
+        if until is not None:
+            statement = statement.where(Punishment.added_at < until)
+
+        if before_id is not None:
+            statement = statement.where(Punishment.punishment_id < before_id)
+
+        statement = statement.order_by(Punishment.punishment_id.desc()).limit(limit)
+
+        result = await session.execute(statement)
+        return list(result.scalars().all())
+
+
+async def deactivate_punishment(punishment_id: int) -> bool:
+    """
+    Mark a punishment as inactive
+    :param punishment_id:
+    :return:
+    """
+    async with db.session() as session:
+        stmt = (
+            update(Punishment)
+            .where(
+                Punishment.punishment_id == punishment_id,
+                Punishment.is_active == True,
+            )
+            .values(is_active=False)
+        )
         result = await session.execute(stmt)
         return result.rowcount > 0
 
 
+async def fail_punishment(punishment_id: int) -> bool:
+    """
+    Mark a punishment whose Discord action failed, taking it back out of the offender summary and any rollup
+    that already counted it, all in one transaction
+    :param punishment_id:
+    :return: whether the punishment was found and not already failed
+    """
+    async with db.session() as session:
+        result = await session.execute(
+            update(Punishment)
+            .where(Punishment.punishment_id == punishment_id, Punishment.failed == False)
+            .values(is_active=False, failed=True)
+            .returning(Punishment)
+        )
+        punishment = result.scalar_one_or_none()
+        if punishment is None:
+            return False
+
+        # Locking the summary first means a concurrent insert is either counted here or added on top afterwards
+        await session.execute(
+            select(OffenderSummary.user_id).where(OffenderSummary.user_id == punishment.user_id).with_for_update()
+        )
+        await backfill_offender_summary(await session.connection(), punishment.user_id)
+
+        # Waits out a running roll up, whose batch may hold this row
+        state = await session.get(RollupState, "punishment", with_for_update=True)
+        if state is not None and punishment.punishment_id <= state.last_punishment_id:
+            await _unroll_punishment(session, punishment, state.last_punishment_id)
+
+        return True
+
+
+async def _unroll_punishment(session, punishment: Punishment, rolled_up_to: int) -> None:
+    """
+    Take an already rolled up punishment back out of the hourly, daily and offender rollups
+    :param session:
+    :param punishment:
+    :param rolled_up_to: the last punishment ID the rollups include
+    :return:
+    """
+    added_at = punishment.added_at.astimezone(timezone.utc)
+    hour = added_at.replace(minute=0, second=0, microsecond=0)
+    day = hour.replace(hour=0)
+
+    for model, bucket in (PunishmentRollupHourly, hour), (PunishmentRollupDaily, day):
+        key = (
+            model.guild_id == punishment.guild_id,
+            model.bucket == bucket,
+            model.punishment_type == punishment.punishment_type,
+            model.moderator_id == punishment.moderator_id,
+        )
+        await session.execute(update(model).where(*key).values(count=model.count - 1))
+        await session.execute(delete(model).where(*key, model.count <= 0))
+
+    # first_at and last_at cannot be decremented, the user's day is recounted from its few rows instead
+    key = (
+        OffenderRollupDaily.guild_id == punishment.guild_id,
+        OffenderRollupDaily.bucket == day,
+        OffenderRollupDaily.user_id == punishment.user_id,
+    )
+    remaining = (
+        await session.execute(
+            select(func.count(), func.min(Punishment.added_at), func.max(Punishment.added_at)).where(
+                Punishment.guild_id == punishment.guild_id,
+                Punishment.user_id == punishment.user_id,
+                Punishment.punishment_id <= rolled_up_to,
+                Punishment.failed == False,
+                Punishment.added_at >= day,
+                Punishment.added_at < day + timedelta(days=1),
+            )
+        )
+    ).one()
+
+    if remaining[0]:
+        await session.execute(
+            update(OffenderRollupDaily)
+            .where(*key)
+            .values(count=remaining[0], first_at=remaining[1], last_at=remaining[2])
+        )
+    else:
+        await session.execute(delete(OffenderRollupDaily).where(*key))
+
+
 async def get_active_timeouts(guild_id: int) -> List[Punishment]:
     """
     Get all active timeout punishments for a guild
     :param guild_id:
     :return:
     """
-    async with db.session() as session:
+    async with db.session(read_only=True) as session:
         query = select(Punishment).where(
             Punishment.guild_id == guild_id,
             Punishment.punishment_type == PunishmentType.TIMEOUT,
@@ -109,17 +453,19 @@ async def get_active_timeouts(guild_id: int) -> List[Punishment]:
 
 async def get_guild_moderation_stats(guild_id: int) -> Dict:
     """
-    Get moderation statistics for a guild
+    Get moderation statistics for a guild, leaving out actions that failed on Discord
     :param guild_id:
     :return:
     """
-    async with db.session() as session:
-        total_query = select(func.count(Punishment.punishment_id)).where(Punishment.guild_id == guild_id)
+    async with db.session(read_only=True) as session:
+        recorded = (Punishment.guild_id == guild_id, Punishment.failed == False)
+
+        total_query = select(func.count(Punishment.punishment_id)).where(*recorded)
         total_result = await session.execute(total_query)
         total = total_result.scalar() or 0
 
         active_query = select(func.count(Punishment.punishment_id)).where(
-            Punishment.guild_id == guild_id,
+            *recorded,
             Punishment.is_active == True,
         )
         active_result = await session.execute(active_query)
@@ -129,7 +475,7 @@ async def get_guild_moderation_stats(guild_id: int) -> Dict:
 
         type_query = (
             select(Punishment.punishment_type, func.count(Punishment.punishment_id))
-            .where(Punishment.guild_id == guild_id)
+            .where(*recorded)
             .group_by(Punishment.punishment_type)
         )
         type_result = await session.execute(type_query)
@@ -137,7 +483,7 @@ async def get_guild_moderation_stats(guild_id: int) -> Dict:
 
         mod_query = (
             select(Punishment.moderator_id, func.count(Punishment.punishment_id))
-            .where(Punishment.guild_id == guild_id)
+            .where(*recorded)
             .group_by(Punishment.moderator_id)
             .order_by(func.count(Punishment.punishment_id).desc())
         )
@@ -151,3 +497,234 @@ async def get_guild_moderation_stats(guild_id: int) -> Dict:
             "by_type": by_type,
             "top_moderators": top_moderators,
         }
+
+
+async def get_offender_summary(user_id: int) -> Optional[OffenderSummary]:
+    """
+    Get a user's punishment summary across every guild, a single primary key read
+    :param user_id:
+    :return:
+    """
+    async with db.session(read_only=True) as session:
+        return await session.get(OffenderSummary, user_id)
+
+
+async def get_all_guild_settings() -> List[GuildSettings]:
+    """
+    Get the stored settings of every guild
+    :return:
+    """
+    async with db.session() as session:
+        result = await session.execute(select(GuildSettings))
+        return list(result.scalars().all())
+
+
+async def get_guild_settings(guild_id: int) -> Optional[GuildSettings]:
+    """
+    Get the stored settings of a guild
+    :param guild_id:
+    :return:
+    """
+    async with db.session() as session:
+        return await session.get(GuildSettings, guild_id)
+
+
+async def update_guild_settings(guild_id: int, **values) -> GuildSettings:
+    """
+    Create or update a guild's settings and notify every listening process
+    :param guild_id:
+    :param values:
+    :return:
+    """
+    async with db.session() as session:
+        stmt = (
+            pg_insert(GuildSettings)
+            .values(guild_id=guild_id, **values)
+            .on_conflict_do_update(
+                index_elements=[GuildSettings.guild_id],
+                set_={**values, "updated_at": retrieve_current_time()},
+            )
+            .returning(GuildSettings)
+        )
+        result = await session.execute(stmt)
+        settings = result.scalar_one()
+
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": SETTINGS_CHANNEL, "payload": str(guild_id)},
+        )
+
+        return settings
+
+
+def _utc_trunc(unit: str, column):
+    # Literals rather than bind parameters, so the expression matches itself in GROUP BY
+    utc = literal_column("'UTC'")
+    return func.timezone(utc, func.date_trunc(literal_column(f"'{unit}'"), func.timezone(utc, column)))
+
+
+def _upsert_counts(model, source, keys: List[str]):
+    stmt = pg_insert(model).from_select([*keys, "count"], source)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={"count": model.count + stmt.excluded.count},
+    )
+
+
+async def roll_up_punishments(batch: int = 50_000) -> int:
+    """
+    Fold the next batch of punishments into the hourly, daily and offender rollups
+    Runs in one transaction under an advisory lock, safe to call from several processes
+    :param batch:
+    :return: the number of punishments rolled up
+    """
+    async with db.session() as session:
+        locked = await session.execute(select(func.pg_try_advisory_xact_lock(_ROLLUP_LOCK)))
+        if not locked.scalar():
+            return 0
+
+        state = await session.get(RollupState, "punishment", with_for_update=True)
+        if state is None:
+            state = RollupState(name="punishment", last_punishment_id=0)
+            session.add(state)
+        low = state.last_punishment_id
+
+        window = (
+            select(Punishment.punishment_id)
+            .where(
+                Punishment.punishment_id > low,
+                Punishment.added_at < retrieve_current_time() - ROLLUP_SETTLE,
+            )
+            .order_by(Punishment.punishment_id)
+            .limit(batch)
+            .subquery()
+        )
+        span = (await session.execute(select(func.max(window.c.punishment_id), func.count()))).one()
+        high, rolled = span[0], span[1]
+        if not rolled:
+            return 0
+
+        in_batch = (Punishment.punishment_id > low, Punishment.punishment_id <= high, Punishment.failed == False)
+
+        for model, unit in (PunishmentRollupHourly, "hour"), (PunishmentRollupDaily, "day"):
+            bucket = _utc_trunc(unit, Punishment.added_at)
+            source = (
+                select(
+                    Punishment.guild_id,
+                    bucket,
+                    Punishment.punishment_type,
+                    Punishment.moderator_id,
+                    func.count(),
+                )
+                .where(*in_batch)
+                .group_by(Punishment.guild_id, bucket, Punishment.punishment_type, Punishment.moderator_id)
+            )
+            await session.execute(
+                _upsert_counts(model, source, ["guild_id", "bucket", "punishment_type", "moderator_id"])
+            )
+
+        day = _utc_trunc("day", Punishment.added_at)
+        offenders = pg_insert(OffenderRollupDaily).from_select(
+            ["guild_id", "bucket", "user_id", "count", "first_at", "last_at"],
+            select(
+                Punishment.guild_id,
+                day,
+                Punishment.user_id,
+                func.count(),
+                func.min(Punishment.added_at),
+                func.max(Punishment.added_at),
+            )
+            .where(*in_batch)
+            .group_by(Punishment.guild_id, day, Punishment.user_id),
+        )
+        await session.execute(
+            offenders.on_conflict_do_update(
+                index_elements=["guild_id", "bucket", "user_id"],
+                set_={
+                    "count": OffenderRollupDaily.count + offenders.excluded.count,
+                    "first_at": func.least(OffenderRollupDaily.first_at, offenders.excluded.first_at),
+                    "last_at": func.greatest(OffenderRollupDaily.last_at, offenders.excluded.last_at),
+                },
+            )
+        )
+
+        # high is only reached through rows that exist, so the batch is never split below it
+        state.last_punishment_id = high
+        return rolled
+
+
+async def get_action_series(
+    guild_id: int,
+    since: datetime,
+    granularity: str = "day",
+    by: str = "type",
+) -> List[Tuple[datetime, object, int]]:
+    """
+    Get moderation action counts per time bucket from the rollups
+    :param guild_id:
+    :param since:
+    :param granularity: hour, day or week
+    :param by: type or moderator
+    :return: (bucket, punishment type or moderator ID, count) rows in time order
+    """
+    model = PunishmentRollupHourly if granularity == "hour" else PunishmentRollupDaily
+    bucket = _utc_trunc("week", model.bucket) if granularity == "week" else model.bucket
+    key = model.moderator_id if by == "moderator" else model.punishment_type
+
+    async with db.session(read_only=True) as session:
+        query = (
+            select(bucket, key, func.sum(model.count))
+            .where(model.guild_id == guild_id, model.bucket >= since)
+            .group_by(bucket, key)
+            .order_by(bucket)
+        )
+        result = await session.execute(query)
+        return [(row[0], row[1], int(row[2])) for row in result.all()]
+
+
+async def get_repeat_offenders(guild_id: int, since: datetime, limit: int = 10) -> List[Tuple[int, int]]:
+    """
+    Get the users punished most often in a guild since a date, only counting repeat offenders
+    :param guild_id:
+    :param since:
+    :param limit:
+    :return: (user ID, punishment count) rows
+    """
+    async with db.session(read_only=True) as session:
+        total = func.sum(OffenderRollupDaily.count)
+        query = (
+            select(OffenderRollupDaily.user_id, total)
+            .where(OffenderRollupDaily.guild_id == guild_id, OffenderRollupDaily.bucket >= since)
+            .group_by(OffenderRollupDaily.user_id)
+            .having(total > 1)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return [(row[0], int(row[1])) for row in result.all()]
+
+
+async def get_mean_time_between_offenses(guild_id: int, since: datetime) -> Optional[timedelta]:
+    """
+    Get the mean gap between a repeat offender's punishments, averaged over repeat offenders
+    :param guild_id:
+    :param since:
+    :return: None when nobody was punished more than once
+    """
+    async with db.session(read_only=True) as session:
+        total = func.sum(OffenderRollupDaily.count)
+        per_user = (
+            select(
+                (
+                    extract("epoch", func.max(OffenderRollupDaily.last_at) - func.min(OffenderRollupDaily.first_at))
+                    / (total - 1)
+                ).label("gap")
+            )
+            .where(OffenderRollupDaily.guild_id == guild_id, OffenderRollupDaily.bucket >= since)
+            .group_by(OffenderRollupDaily.user_id)
+            .having(total > 1)
+            .subquery()
+        )
+        result = await session.execute(select(func.avg(per_user.c.gap)))
+        seconds = result.scalar()
+        return timedelta(seconds=float(seconds)) if seconds is not None else None
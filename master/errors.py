@@ -1,5 +1,7 @@
 from discord.ext import commands
 
+from master.lifecycle import ShuttingDown
+
 
 class Errors(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -16,12 +18,16 @@ class Errors(commands.Cog):
             return
         if isinstance(error, commands.ChannelNotFound):
             message = f"⚠️ Invalid channel **{error.argument}** not found!"
+        elif isinstance(error, commands.MissingRequiredFlag):
+            message = f"⚠️ Missing argument: `{error.flag.name}`"
         elif isinstance(error, commands.BadArgument):
             message = "⚠️ Invalid argument. Check your input and try again"
         elif isinstance(error, commands.MissingRequiredArgument):
             message = f"⚠️ Missing argument: `{error.param.name}`"
         elif isinstance(error, commands.CommandOnCooldown):
             message = f"⌛ This command is on cooldown. Try again in {error.retry_after:.1f}s"
+        elif isinstance(error, ShuttingDown):
+            message = f"🔄 {error}"
         else:
             print(f"Command issue at {ctx.guild.id} -> {error}")
             message = f"❌ Something went wrong: {error}"
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Set
+
+from discord.ext import commands
+
+from master import pipeline, settings
+
+_accepting = True
+_commands: Set[asyncio.Task] = set()
+
+
+class ShuttingDown(commands.CheckFailure):
+    """
+    Raised for commands invoked after shutdown has begun
+    """
+
+
+async def accepting(ctx: commands.Context) -> bool:
+    """
+    Global check refusing new commands once shutdown has begun
+    :param ctx:
+    :return:
+    """
+    if not _accepting:
+        raise ShuttingDown("The bot is restarting, try again in a moment")
+    return True
+
+
+async def track(ctx: commands.Context) -> None:
+    """
+    Before invoke hook recording the task running a command until it finishes
+    :param ctx:
+    :return:
+    """
+    task = asyncio.current_task()
+    if task is not None and task not in _commands:
+        _commands.add(task)
+        task.add_done_callback(_commands.discard)
+
+
+def stop_accepting() -> None:
+    global _accepting
+    _accepting = False
+
+
+def in_flight() -> Set[asyncio.Task]:
+    """
+    Return every task shutdown should wait for: commands, punishments and settings refreshes
+    :return:
+    """
+    return _commands | pipeline.in_flight() | settings.in_flight()
+
+
+async def drain(timeout: float) -> int:
+    """
+    Wait for in-flight work to finish, including work it spawns while draining
+    :param timeout: seconds before giving up
+    :return: the number of tasks still running at the deadline
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while True:
+        tasks = in_flight()
+        remaining = deadline - loop.time()
+        if not tasks or remaining <= 0:
+            return len(tasks)
+        await asyncio.wait(tasks, timeout=remaining)
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Dict, Optional, Set, Tuple
+
+from master import compass
+from models.punishment import Punishment
+from models.punishment_type import PunishmentType
+
+RECORD_RETRIES = 2
+RECORD_RETRY_DELAY = 0.5
+
+_background: Set[asyncio.Task] = set()
+# Tasks currently inside run_punishment, so shutdown can wait for actions already under way
+_running: Set[asyncio.Task] = set()
+
+
+def _spawn(coro: Awaitable) -> None:
+    """
+    Run a coroutine in the background, keeping a strong reference until it finishes
+    :param coro:
+    :return:
+    """
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def in_flight() -> Set[asyncio.Task]:
+    """
+    Return the tasks still applying or compensating a punishment
+    :return:
+    """
+    return _running | _background
+
+
+async def _compensate(punishment_id: int) -> None:
+    """
+    Mark a punishment whose Discord action failed, so it stops counting towards summaries and rollups
+    :param punishment_id:
+    :return:
+    """
+    try:
+        await compass.fail_punishment(punishment_id)
+    except Exception as e:
+        print(f"Failed to mark punishment {punishment_id} as failed after a failed action -> {e}")
+
+
+async def _record_applied(values: Dict, error: BaseException) -> Optional[Punishment]:
+    """
+    Retry recording a punishment whose Discord action went through, backing off between attempts
+    :param values: the create_punishment keyword arguments
+    :param error: why the first attempt failed
+    :return: the recorded punishment, or None when every retry failed
+    """
+    for attempt in range(RECORD_RETRIES):
+        print(f"Retrying to record {values['punishment_type'].value} for {values['user_id']} -> {error}")
+        await asyncio.sleep(RECORD_RETRY_DELAY * 2**attempt)
+        try:
+            return await compass.create_punishment(**values)
+        except Exception as e:
+            error = e
+
+    print(f"Gave up recording {values['punishment_type'].value} for {values['user_id']} -> {error}")
+    return None
+
+
+async def run_punishment(
+    action: Awaitable[bool],
+    guild_id: int,
+    user_id: int,
+    moderator_id: int,
+    punishment_type: PunishmentType,
+    reason: str,
+    expires_at: Optional[datetime] = None,
+) -> Tuple[bool, Optional[Punishment]]:
+    """
+    Run a Discord action and record its punishment concurrently.
+    If the action fails the recorded row is marked failed in the background,
+    so the caller can reply as soon as both outcomes are known.
+    If the action went through but the insert failed, the insert is retried before returning,
+    a punishment of None alongside an applied action means it could not be logged.
+    :param action:
+    :param guild_id:
+    :param user_id:
+    :param moderator_id:
+    :param punishment_type:
+    :param reason:
+    :param expires_at:
+    :return: whether the action was applied, and the recorded punishment if any
+    """
+    task = asyncio.current_task()
+    if task is not None and task not in _running:
+        _running.add(task)
+        task.add_done_callback(_running.discard)
+
+    values = {
+        "guild_id": guild_id,
+        "user_id": user_id,
+        "moderator_id": moderator_id,
+        "punishment_type": punishment_type,
+        "reason": reason,
+        "expires_at": expires_at,
+    }
+    applied, punishment = await asyncio.gather(
+        action,
+        compass.create_punishment(**values),
+        return_exceptions=True,
+    )
+
+    if isinstance(applied, BaseException):
+        print(f"Something went wrong when applying {punishment_type.value} at {guild_id}: {applied}")
+        applied = False
+
+    if isinstance(punishment, BaseException):
+        if applied:
+            punishment = await _record_applied(values, punishment)
+        else:
+            punishment = None
+
+    if not applied and punishment is not None:
+        punishment.is_active = False
+        punishment.failed = True
+        _spawn(_compensate(punishment.punishment_id))
+
+    return applied, punishment
@@ -0,0 +1,263 @@
+import asyncio
+import time
+from array import array
+from datetime import timedelta
+from typing import Dict, List, Optional, Set
+
+import discord
+from discord.ext import commands, tasks
+
+from core.helper import retrieve_current_time
+from master import compass, service, settings
+from models.punishment_type import PunishmentType
+
+JOIN_WINDOW = 10.0
+YOUNG_JOIN_THRESHOLD = 6
+YOUNG_ACCOUNT_AGE = timedelta(days=7)
+
+RAID_REASON = "Automatic raid protection"
+
+WINDOW_CAPACITY = 256
+FLUSH_SIZE = 500
+
+# Account age histogram bucket upper bounds in seconds: < 1h, < 1d, < 7d, < 30d, older
+AGE_BUCKETS = (3_600, 86_400, 604_800, 2_592_000)
+
+
+def age_bucket(age_seconds: float) -> int:
+    """
+    Return the histogram bucket for an account age
+    :param age_seconds:
+    :return:
+    """
+    for index, bound in enumerate(AGE_BUCKETS):
+        if age_seconds < bound:
+            return index
+    return len(AGE_BUCKETS)
+
+
+class JoinWindow:
+    """
+    Fixed size ring buffer of the recent joins to one guild with a running account age histogram
+    """
+
+    __slots__ = ("times", "user_ids", "buckets", "head", "size", "histogram")
+
+    def __init__(self, capacity: int = WINDOW_CAPACITY):
+        self.times = array("d", bytes(8 * capacity))
+        self.user_ids = array("Q", bytes(8 * capacity))
+        self.buckets = array("b", bytes(capacity))
+        self.head = 0
+        self.size = 0
+        self.histogram = [0] * (len(AGE_BUCKETS) + 1)
+
+    def _pop(self) -> None:
+        self.histogram[self.buckets[self.head]] -= 1
+        self.head = (self.head + 1) % len(self.times)
+        self.size -= 1
+
+    def expire(self, cutoff: float) -> None:
+        while self.size and self.times[self.head] < cutoff:
+            self._pop()
+
+    def push(self, now: float, user_id: int, bucket: int) -> None:
+        self.expire(now - JOIN_WINDOW)
+        if self.size == len(self.times):
+            self._pop()
+
+        index = (self.head + self.size) % len(self.times)
+        self.times[index] = now
+        self.user_ids[index] = user_id
+        self.buckets[index] = bucket
+        self.histogram[bucket] += 1
+        self.size += 1
+
+    def young_joins(self, max_bucket: int) -> int:
+        return sum(self.histogram[: max_bucket + 1])
+
+    def young_user_ids(self, max_bucket: int) -> List[int]:
+        capacity = len(self.times)
+        return [
+            self.user_ids[(self.head + offset) % capacity]
+            for offset in range(self.size)
+            if self.buckets[(self.head + offset) % capacity] <= max_bucket
+        ]
+
+
+class RaidGuard(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.windows: Dict[int, JoinWindow] = {}
+        self.raid_until: Dict[int, float] = {}
+        self.previous_verification: Dict[int, discord.VerificationLevel] = {}
+        self.pending: List[Dict] = []
+        self.writing: Set[asyncio.Task] = set()
+        self.young_bucket = age_bucket(YOUNG_ACCOUNT_AGE.total_seconds() - 1)
+
+    async def cog_load(self):
+        self.maintenance.start()
+
+    async def cog_unload(self):
+        self.maintenance.cancel()
+        # A batch the cancelled loop was writing keeps going, wait for it before the final flush
+        await asyncio.gather(*self.writing)
+        # Saved verification levels only live in this process, lift every lockdown rather than leave it for good
+        await asyncio.gather(
+            *(self.end_raid(guild_id) for guild_id in set(self.raid_until) | set(self.previous_verification))
+        )
+        await self.flush()
+
+    def _record(self, guild: discord.Guild, member_id: int, duration: timedelta) -> None:
+        """
+        Buffer an automated timeout for the next batch insert
+        :param guild:
+        :param member_id:
+        :param duration:
+        :return:
+        """
+        now = retrieve_current_time()
+        self.pending.append(
+            {
+                "guild_id": guild.id,
+                "user_id": member_id,
+                "moderator_id": self.bot.user.id,
+                "punishment_type": PunishmentType.TIMEOUT,
+                "reason": RAID_REASON,
+                "added_at": now,
+                "expires_at": now + duration,
+            }
+        )
+
+    async def _timeout(self, guild: discord.Guild, member: Optional[discord.Member]) -> None:
+        config = settings.get(guild.id)
+        if not config.raid_auto_timeout or member is None or member.bot:
+            return
+
+        duration = timedelta(minutes=config.raid_timeout_minutes)
+        if await service.apply_timeout(guild, member, duration, RAID_REASON):
+            self._record(guild, member.id, duration)
+
+    async def flush(self) -> None:
+        """
+        Write buffered raid punishments in one statement
+        :return:
+        """
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, []
+        task = asyncio.ensure_future(self._write(pending))
+        self.writing.add(task)
+        task.add_done_callback(self.writing.discard)
+
+        # Shielded so cancelling the maintenance loop mid write cannot drop the batch
+        await asyncio.shield(task)
+
+    @staticmethod
+    async def _write(pending: List[Dict]) -> None:
+        try:
+            await compass.create_punishments(pending)
+        except Exception as e:
+            print(f"Failed to record {len(pending)} raid punishment(s) -> {e}")
+
+    async def start_raid(self, guild: discord.Guild, window: JoinWindow) -> None:
+        """
+        Lock the guild down and time out the young accounts already in the window
+        :param guild:
+        :param window:
+        :return:
+        """
+        config = settings.get(guild.id)
+        self.raid_until[guild.id] = time.monotonic() + config.raid_duration_minutes * 60
+        print(f"Raid detected at {guild.id} -> {window.size} joins in {JOIN_WINDOW:.0f}s")
+
+        if config.raid_lockdown and guild.verification_level < discord.VerificationLevel.high:
+            self.previous_verification[guild.id] = guild.verification_level
+            try:
+                await guild.edit(verification_level=discord.VerificationLevel.high, reason=RAID_REASON)
+            except Exception as e:
+                print(f"Something went wrong when locking down guild at {guild.id}: {e}")
+
+        await asyncio.gather(
+            *(self._timeout(guild, guild.get_member(user_id)) for user_id in window.young_user_ids(self.young_bucket))
+        )
+
+    async def end_raid(self, guild_id: int) -> None:
+        """
+        Restore the verification level a raid lockdown replaced
+        :param guild_id:
+        :return:
+        """
+        self.raid_until.pop(guild_id, None)
+        previous = self.previous_verification.get(guild_id)
+        guild = self.bot.get_guild(guild_id)
+
+        if previous is None:
+            return
+
+        if guild is not None:
+            try:
+                await guild.edit(verification_level=previous, reason="Raid protection ended")
+            except Exception as e:
+                print(f"Something went wrong when lifting lockdown at {guild_id}: {e}")
+
+        # Dropped once the edit is done, so an edit cancelled at shutdown is retried by cog_unload
+        self.previous_verification.pop(guild_id, None)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        if member.bot:
+            return
+
+        guild = member.guild
+        config = settings.get(guild.id)
+        if not config.raid_protection:
+            return
+
+        now = time.monotonic()
+        bucket = age_bucket((retrieve_current_time() - member.created_at).total_seconds())
+
+        window = self.windows.get(guild.id)
+        if window is None:
+            window = self.windows[guild.id] = JoinWindow()
+        window.push(now, member.id, bucket)
+
+        raid_until = self.raid_until.get(guild.id)
+        if raid_until is not None:
+            self.raid_until[guild.id] = max(raid_until, now + JOIN_WINDOW)
+            if bucket <= self.young_bucket:
+                await self._timeout(guild, member)
+        elif (
+            window.size >= config.raid_join_threshold
+            or window.young_joins(self.young_bucket) >= YOUNG_JOIN_THRESHOLD
+        ):
+            await self.start_raid(guild, window)
+
+        if len(self.pending) >= FLUSH_SIZE:
+            await self.flush()
+
+    @tasks.loop(seconds=5)
+    async def maintenance(self):
+        """
+        Flush buffered punishments, end finished raids and drop idle windows
+        :return:
+        """
+        await self.flush()
+
+        now = time.monotonic()
+        for guild_id, until in list(self.raid_until.items()):
+            if until <= now:
+                await self.end_raid(guild_id)
+
+        for guild_id, window in list(self.windows.items()):
+            window.expire(now - JOIN_WINDOW)
+            if not window.size:
+                del self.windows[guild_id]
+
+    @maintenance.before_loop
+    async def before_maintenance(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(RaidGuard(bot))
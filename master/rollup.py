@@ -0,0 +1,36 @@
+from discord.ext import commands, tasks
+
+from master import compass
+
+ROLLUP_BATCH = 50_000
+
+
+class Rollups(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        self.roll_up.start()
+
+    async def cog_unload(self):
+        self.roll_up.cancel()
+
+    @tasks.loop(minutes=1)
+    async def roll_up(self):
+        """
+        Fold new punishments into the analytics rollups, catching up in batches after downtime
+        :return:
+        """
+        try:
+            while await compass.roll_up_punishments(ROLLUP_BATCH) == ROLLUP_BATCH:
+                pass
+        except Exception as e:
+            print(f"Failed to roll up punishments -> {e}")
+
+    @roll_up.before_loop
+    async def before_roll_up(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Rollups(bot))
@@ -28,6 +28,28 @@ async def apply_ban(
         return False
 
 
+async def remove_ban(
+    guild: discord.Guild,
+    user: discord.abc.Snowflake,
+    reason: str = "Punishment revoked",
+) -> bool:
+    """
+    Unban a user from the guild, a user who is no longer banned counts as unbanned
+    :param guild:
+    :param user:
+    :param reason:
+    :return:
+    """
+    try:
+        await guild.unban(user, reason=reason)
+        return True
+    except discord.NotFound:
+        return True
+    except Exception as e:
+        print(f"Something went wrong when unbanning user at {guild.id}: {e}")
+        return False
+
+
 async def apply_kick(
     guild: discord.Guild,
     member: discord.Member,
@@ -102,7 +124,7 @@ async def remove_timeout(
     reason: str = "Timeout expired",
 ) -> bool:
     """
-    Remove a timeout from a user on the guild
+    Remove a timeout from a user on the guild, a member who has left counts as lifted
     :param guild:
     :param member:
     :param reason:
@@ -111,6 +133,8 @@ async def remove_timeout(
     try:
         await member.timeout(None, reason=reason)
         return True
+    except discord.NotFound:
+        return True
     except Exception as e:
         print(f"Something went wrong when removing a timeout from user at {guild.id}: {e}")
         return False
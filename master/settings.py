@@ -0,0 +1,136 @@
+import asyncio
+from types import MappingProxyType
+from typing import List, Mapping, NamedTuple, Optional, Set
+
+import discord
+from discord.ext import commands
+
+from backend import db
+from core.helper import DEFAULT_TIMEZONE
+from master import compass
+from models.guild_settings import GuildSettings
+
+
+class Settings(NamedTuple):
+    prefix: str = "?"
+    embed_color: int = 0x393A41
+    timezone: str = DEFAULT_TIMEZONE
+    max_timeout_days: int = 28
+    modlog_limit: int = 25
+    raid_protection: bool = True
+    raid_join_threshold: int = 10
+    raid_lockdown: bool = True
+    raid_auto_timeout: bool = True
+    raid_timeout_minutes: int = 60
+    raid_duration_minutes: int = 10
+    automod: bool = True
+
+
+DEFAULTS = Settings()
+
+# Replaced wholesale on every change, never mutated, so readers need no lock
+_snapshot: Mapping[int, Settings] = MappingProxyType({})
+_refreshing: Set[asyncio.Task] = set()
+
+
+def get(guild_id: Optional[int]) -> Settings:
+    """
+    Return a guild's settings from the in-memory snapshot
+    :param guild_id:
+    :return:
+    """
+    return _snapshot.get(guild_id, DEFAULTS)
+
+
+def resolve_prefix(bot: commands.Bot, message: discord.Message) -> List[str]:
+    """
+    command_prefix callable, the guild's prefix or a mention of the bot
+    :param bot:
+    :param message:
+    :return:
+    """
+    prefix = get(message.guild.id if message.guild else None).prefix
+    return commands.when_mentioned_or(prefix)(bot, message)
+
+
+def _from_row(row: GuildSettings) -> Settings:
+    return Settings(*(getattr(row, field) for field in Settings._fields))
+
+
+def store(guild_id: int, settings: Optional[Settings]) -> None:
+    """
+    Swap in a snapshot with one guild's settings replaced, or removed when None
+    :param guild_id:
+    :param settings:
+    :return:
+    """
+    global _snapshot
+    snapshot = dict(_snapshot)
+    if settings is None:
+        snapshot.pop(guild_id, None)
+    else:
+        snapshot[guild_id] = settings
+    _snapshot = MappingProxyType(snapshot)
+
+
+async def load() -> int:
+    """
+    Load every guild's settings into a fresh snapshot
+    :return: the number of guilds with stored settings
+    """
+    global _snapshot
+    rows = await compass.get_all_guild_settings()
+    _snapshot = MappingProxyType({row.guild_id: _from_row(row) for row in rows})
+    return len(rows)
+
+
+async def refresh(guild_id: int) -> None:
+    """
+    Reload one guild's settings after a change notification
+    :param guild_id:
+    :return:
+    """
+    row = await compass.get_guild_settings(guild_id)
+    store(guild_id, _from_row(row) if row else None)
+
+
+def in_flight() -> Set[asyncio.Task]:
+    """
+    Return the refreshes started by change notifications that have not finished
+    :return:
+    """
+    return set(_refreshing)
+
+
+def _on_notify(payload: str) -> None:
+    try:
+        guild_id = int(payload)
+    except ValueError:
+        return
+
+    task = asyncio.ensure_future(refresh(guild_id))
+    _refreshing.add(task)
+    task.add_done_callback(_refreshing.discard)
+
+
+async def update(guild_id: int, **values) -> Settings:
+    """
+    Persist changed settings and apply them locally straight away
+    Other processes pick the change up through the notification
+    :param guild_id:
+    :param values:
+    :return:
+    """
+    row = await compass.update_guild_settings(guild_id, **values)
+    settings = _from_row(row)
+    store(guild_id, settings)
+    return settings
+
+
+async def start() -> int:
+    """
+    Load the snapshot and subscribe to change notifications
+    :return: the number of guilds with stored settings
+    """
+    await db.listen(compass.SETTINGS_CHANNEL, _on_notify)
+    return await load()
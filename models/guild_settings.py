@@ -0,0 +1,32 @@
+from sqlalchemy import Column, BigInteger, Boolean, DateTime, Integer, String
+
+from backend.base import Base
+from core.helper import DEFAULT_TIMEZONE, retrieve_current_time
+
+
+class GuildSettings(Base):
+    __tablename__ = "guild_settings"
+
+    guild_id = Column(BigInteger, primary_key=True)
+
+    prefix = Column(String(8), default="?", nullable=False)
+    embed_color = Column(Integer, default=0x393A41, nullable=False)
+    timezone = Column(String(64), default=DEFAULT_TIMEZONE, nullable=False)
+
+    max_timeout_days = Column(Integer, default=28, nullable=False)
+    modlog_limit = Column(Integer, default=25, nullable=False)
+
+    raid_protection = Column(Boolean, default=True, nullable=False)
+    raid_join_threshold = Column(Integer, default=10, nullable=False)
+    raid_lockdown = Column(Boolean, default=True, nullable=False)
+    raid_auto_timeout = Column(Boolean, default=True, nullable=False)
+    raid_timeout_minutes = Column(Integer, default=60, nullable=False)
+    raid_duration_minutes = Column(Integer, default=10, nullable=False)
+    automod = Column(Boolean, default=True, nullable=False)
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=retrieve_current_time,
+        onupdate=retrieve_current_time,
+        nullable=False,
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, BigInteger, DateTime, Enum, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from backend.base import Base
+from models.punishment_type import PunishmentType
+
+
+class OffenderSummary(Base):
+    """
+    One row per punished user across every guild, maintained alongside each punishment insert
+    """
+
+    __tablename__ = "offender_summary"
+
+    user_id = Column(BigInteger, primary_key=True)
+
+    bans = Column(Integer, default=0, nullable=False)
+    kicks = Column(Integer, default=0, nullable=False)
+    timeouts = Column(Integer, default=0, nullable=False)
+    warns = Column(Integer, default=0, nullable=False)
+
+    last_action_at = Column(DateTime(timezone=True), nullable=False)
+    last_punishment_type = Column(Enum(PunishmentType, name="punishment_type_enum"), nullable=False)
+    last_guild_id = Column(BigInteger, nullable=False)
+
+    guild_ids = Column(ARRAY(BigInteger), nullable=False)
+
+    @property
+    def total(self) -> int:
+        return self.bans + self.kicks + self.timeouts + self.warns
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, BigInteger, Boolean, DateTime, String, Enum
+from sqlalchemy import Column, BigInteger, Boolean, Computed, DateTime, String, Enum, Index, false
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 
 from backend.base import Base
 from core.helper import retrieve_current_time
@@ -7,6 +9,12 @@ from models.punishment_type import PunishmentType
 
 class Punishment(Base):
     __tablename__ = "punishment"
+    __table_args__ = (
+        Index("ix_punishment_guild_active_id", "guild_id", "is_active", "punishment_id"),
+        Index("ix_punishment_guild_user_id", "guild_id", "user_id", "punishment_id"),
+        Index("ix_punishment_guild_punishment_id", "guild_id", "punishment_id"),
+        Index("ix_punishment_reason_tsv", "reason_tsv", postgresql_using="gin"),
+    )
 
     punishment_id = Column(BigInteger, primary_key=True, autoincrement=True)
 
@@ -20,8 +28,12 @@ class Punishment(Base):
     )
 
     reason = Column(String, nullable=False)
+    # Maintained by Postgres for full text search, deferred so regular loads never fetch it
+    reason_tsv = deferred(Column(TSVECTOR, Computed("to_tsvector('english', reason)", persisted=True)))
 
-    added_at = Column(DateTime, default=retrieve_current_time, nullable=False)
-    expires_at = Column(DateTime, nullable=True)
+    added_at = Column(DateTime(timezone=True), default=retrieve_current_time, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
 
     is_active = Column(Boolean, default=True, nullable=False, index=True)
+    # Set when the Discord action failed after the row was written, such rows are left out of summaries and rollups
+    failed = Column(Boolean, default=False, server_default=false(), nullable=False)
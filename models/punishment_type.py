@@ -6,3 +6,21 @@ class PunishmentType(str, Enum):
     KICK = "kick"
     TIMEOUT = "timeout"
     WARN = "warn"
+
+    @classmethod
+    def _missing_(cls, value):
+        # Typed prefix command arguments may come in any case
+        if isinstance(value, str):
+            for member in cls:
+                if member.value == value.lower():
+                    return member
+        return None
+
+    @property
+    def icon(self) -> str:
+        return {
+            PunishmentType.BAN: "🔨",
+            PunishmentType.KICK: "👢",
+            PunishmentType.TIMEOUT: "🔇",
+            PunishmentType.WARN: "⚠️",
+        }[self]
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, BigInteger, DateTime, Enum, Integer, String
+
+from backend.base import Base
+from models.punishment_type import PunishmentType
+
+
+class PunishmentRollupHourly(Base):
+    __tablename__ = "punishment_rollup_hourly"
+
+    guild_id = Column(BigInteger, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    punishment_type = Column(Enum(PunishmentType, name="punishment_type_enum"), primary_key=True)
+    moderator_id = Column(BigInteger, primary_key=True)
+
+    count = Column(Integer, nullable=False)
+
+
+class PunishmentRollupDaily(Base):
+    __tablename__ = "punishment_rollup_daily"
+
+    guild_id = Column(BigInteger, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    punishment_type = Column(Enum(PunishmentType, name="punishment_type_enum"), primary_key=True)
+    moderator_id = Column(BigInteger, primary_key=True)
+
+    count = Column(Integer, nullable=False)
+
+
+class OffenderRollupDaily(Base):
+    __tablename__ = "offender_rollup_daily"
+
+    guild_id = Column(BigInteger, primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+
+    count = Column(Integer, nullable=False)
+    first_at = Column(DateTime(timezone=True), nullable=False)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+
+    name = Column(String(32), primary_key=True)
+    last_punishment_id = Column(BigInteger, default=0, nullable=False)
@@ -2,22 +2,46 @@
 import asyncio
 import os
 import platform
+import signal
 import sys
-from pathlib import Path
+import time
+from contextlib import contextmanager
+from typing import Optional
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
 from backend import db
+from master import lifecycle, settings
+
+STARTED = time.perf_counter()
+
+# Extensions loaded at startup, in no particular order. New cogs must be listed here.
+EXTENSIONS = (
+    "commands.analytics",
+    "commands.automod",
+    "commands.moderation",
+    "commands.settings",
+    "master.errors",
+    "master.listener",
+    "master.raid",
+    "master.rollup",
+)
 
 load_dotenv(f".env")
 
+intents = discord.Intents.default()
+intents.members = True
+intents.message_content = True
+
 bot = commands.Bot(
-    command_prefix="?",
+    command_prefix=settings.resolve_prefix,
     help_command=None,
-    intents=discord.Intents.all(),
+    intents=intents,
 )
+bot.add_check(lifecycle.accepting)
+bot.before_invoke(lifecycle.track)
 
 print("Potion Robot")
 print(
@@ -26,34 +50,118 @@ print(
 )
 
 
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    yield
+    print(f"{name} took {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
 async def backend():
     try:
-        db.init(os.environ["POSTGRES"])
-        await db.init_models()
-        await db.ping()
-        print(f"Running Postgres with SQLAlchemy")
+        with phase("Schema check"):
+            db.init(
+                os.environ["POSTGRES"],
+                replica_urls=[url for url in os.getenv("POSTGRES_REPLICAS", "").split(",") if url],
+                max_replica_lag=float(os.getenv("POSTGRES_MAX_REPLICA_LAG", "2")),
+            )
+            await db.check_schema()
+        with phase("Settings snapshot"):
+            guilds = await settings.start()
+        print(f"Running Postgres with SQLAlchemy, {guilds} guild(s) with custom settings")
     except Exception as e:
         print(f"Failed to connect to Postgres -> {e}")
         sys.exit(1)
 
 
 async def load():
-    for root in "commands", "master":
-        for extension in Path(root).rglob("*.py"):
-            if extension.stem.startswith("__") or any(folder in extension.parts for folder in (".venv", "models")):
-                continue
+    with phase(f"Loading {len(EXTENSIONS)} extension(s)"):
+        await asyncio.gather(*(bot.load_extension(extension) for extension in EXTENSIONS))
+
+
+async def setup_hook():
+    # Extensions load after login so their background loops can wait for the gateway
+    print(f"Logged in to Discord {(time.perf_counter() - STARTED) * 1000:.0f}ms after start")
+    await load()
+
+
+bot.setup_hook = setup_hook
+
+
+async def migrate():
+    db.init(os.environ["POSTGRES"])
+    with phase("Migration"):
+        before, after = await db.migrate()
+    print(f"Schema migrated from version {before} to {after}")
 
-            ext_path = ".".join(extension.with_suffix("").parts)
-            try:
-                await bot.load_extension(ext_path)
-            except commands.NoEntryPointError:
-                continue
+
+async def sync():
+    # Global command sync is rate limited, so it runs on demand after commands change rather than on every boot
+    async with bot:
+        # Logging in runs setup_hook, loading the extensions that register the commands
+        await bot.login(os.getenv("DISCORD_TOKEN"))
+        try:
+            with phase("Command sync"):
+                synced = await bot.tree.sync()
+        except discord.HTTPException as e:
+            print(f"Failed to sync application commands -> {e}")
+            sys.exit(1)
+    print(f"Synced {len(synced)} application command(s)")
+
+
+async def shutdown(reason: str):
+    started = time.perf_counter()
+    timeout = float(os.getenv("SHUTDOWN_TIMEOUT", "20"))
+    print(f"Shutting down on {reason}, draining for up to {timeout:.0f}s")
+
+    lifecycle.stop_accepting()
+    with phase("Draining in-flight work"):
+        left = await lifecycle.drain(timeout)
+    if left:
+        print(f"Gave up waiting on {left} task(s)")
+
+    # Closing unloads every extension, cancelling their loops and flushing buffered raid punishments
+    with phase("Closing the gateway"):
+        await bot.close()
+    # Events that arrived while draining may have started punishments of their own
+    await lifecycle.drain(max(timeout - (time.perf_counter() - started), 0))
+
+    with phase("Disposing database connections"):
+        await db.dispose()
+    print(f"Shutdown took {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+_stopping: Optional[asyncio.Task] = None
+
+
+def stop(reason: str) -> asyncio.Task:
+    global _stopping
+    if _stopping is None:
+        _stopping = asyncio.ensure_future(shutdown(reason))
+    return _stopping
 
 
 async def main():
-    await backend()
-    await load()
-    await bot.start(os.getenv("DISCORD_TOKEN"))
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signal_number, stop, signal_number.name)
+        except NotImplementedError:
+            # Windows event loops have no signal handlers, Ctrl+C still interrupts
+            pass
+
+    try:
+        # The database check runs alongside login and extension loading, events only arrive once both finish
+        await asyncio.gather(backend(), bot.login(os.getenv("DISCORD_TOKEN")))
+        print(f"Startup took {(time.perf_counter() - STARTED) * 1000:.0f}ms before connecting")
+        await bot.connect()
+    finally:
+        await stop("disconnect")
 
 
-asyncio.run(main())
+if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+    asyncio.run(migrate())
+elif len(sys.argv) > 1 and sys.argv[1] == "sync":
+    asyncio.run(sync())
+else:
+    asyncio.run(main())